@@ -0,0 +1,65 @@
+"""Reusable analysis tools built on the material of the Python for Scientists course.
+
+The lessons in the repository root show each technique step by step; the
+modules in this package collect the parts that are worth calling from batch
+jobs.
+
+Importing ``dicca`` is cheap: the submodules, and the heavy libraries they
+depend on (scipy, pandas, xarray, cartopy, scikit-learn), are only imported
+the first time they are accessed, e.g. ``dicca.signal.lowpass_fft``. Run
+``python -m dicca.importtime`` to see what each submodule costs at startup.
+"""
+
+import importlib
+
+__all__ = [
+    # numpy utilities
+    'buffer',
+    'cache',
+    'distance',
+    'fibonacci',
+    'gaps',
+    'histogram',
+    'linalg',
+    'masked',
+    'montecarlo',
+    'normalize',
+    'precision',
+    'quantiles',
+    'simar',
+    'similarity',
+    'solvers',
+    'stats',
+    'table',
+    # scipy
+    'fft',
+    'signal',
+    # pandas
+    'timeseries',
+    # xarray
+    'fields',
+    # cartopy
+    'maps',
+    # scikit-learn
+    'clustering',
+    'regression',
+    # matplotlib
+    'animation',
+    'decimate',
+    'distribution',
+    'render',
+    'rose',
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module(f'{__name__}.{name}')
+        # cache it so that __getattr__ is not called again for this name
+        globals()[name] = module
+        return module
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
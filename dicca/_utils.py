@@ -0,0 +1,25 @@
+"""Small helpers shared by the modules of the package."""
+
+import numpy as np
+
+
+def chunk_slices(n, size):
+    """Split ``range(n)`` into consecutive slices of at most ``size`` elements
+
+    Args:
+        n: total number of elements
+        size: maximum number of elements per slice
+
+    Returns:
+        A list of slices covering ``0..n``
+    """
+    size = max(int(size), 1)
+    return [slice(start, min(start + size, n)) for start in range(0, n, size)]
+
+
+def as_float_dtype(dtype):
+    """Return ``dtype`` as a numpy floating dtype, rejecting anything else"""
+    dtype = np.dtype(dtype)
+    if dtype.kind != 'f':
+        raise TypeError(f'a floating dtype is required, got {dtype}')
+    return dtype
@@ -0,0 +1,160 @@
+"""Time-stepped animation of gridded fields.
+
+``03_matplotlib.py`` and ``06b_xarray_comp.py`` draw each field with a new
+``pcolormesh``/``contourf`` (``ds.swh.isel(time=10).plot()``), so an hourly
+animation of a month of WW3 output creates thousands of meshes, colorbars and
+coastlines. A ``FieldAnimation`` creates the QuadMesh, the colorbar and the map
+background once, keeps a copy of the rendered background, and for every time
+step only replaces the values of the mesh with ``set_array`` and redraws the
+mesh and the title over the saved background (blitting). The frames are
+written as a PNG sequence or collected in an in-memory RGBA buffer.
+
+Example:
+    >>> anim = FieldAnimation(ds.swh, vmin=0, vmax=8, cmap='viridis', extent=[-20, 5, 30, 50])
+    >>> anim.save_frames('pics/swh_{:04d}.png')
+    >>> frames = anim.to_buffer(range(24))     # (24, height, width, 4) uint8
+"""
+
+import numpy as np
+
+
+class FieldAnimation:
+    """Animation of a field with dimensions (time, y, x)
+
+    Args:
+        field: DataArray with the time dimension first, or an array of shape
+            (n_steps, ny, nx). DataArrays are read one step at a time, so
+            lazily loaded files are never loaded as a whole
+        x, y: coordinates of the grid. Default: the coordinates of the
+            DataArray, or the indices for arrays
+        ax: existing axis to draw on. Default: a map from ``dicca.maps.map_axes``
+            if ``geo`` is True, a plain axis otherwise
+        geo: draw on a cartopy map with coastlines, with the grid in
+            PlateCarree coordinates
+        vmin, vmax: limits of the colour scale, fixed for all the steps.
+            Default: the range of the first step
+        labels: title of every step. Default: the time coordinate of the DataArray
+        colorbar: add a colorbar
+        extent: ``[lonW, lonE, latS, latN]`` of the map
+        **kwargs: passed to ``pcolormesh`` (``cmap``, ...)
+    """
+
+    def __init__(self, field, x=None, y=None, ax=None, geo=True, vmin=None, vmax=None,
+                 labels=None, colorbar=True, extent=None, **kwargs):
+        self.field = field
+        self.is_dataarray = hasattr(field, 'isel')
+        if self.is_dataarray:
+            self.time_dim, y_dim, x_dim = field.dims
+            x = field[x_dim].values if x is None else x
+            y = field[y_dim].values if y is None else y
+            if labels is None and self.time_dim in field.coords:
+                times = field[self.time_dim].values
+                if times.dtype.kind == 'M':
+                    times = np.datetime_as_string(times, unit='m')
+                labels = [f'{field.name or ""} {t}'.strip() for t in times]
+        n_steps, ny, nx = field.shape
+        x = np.arange(nx) if x is None else np.asarray(x)
+        y = np.arange(ny) if y is None else np.asarray(y)
+        self.n_steps = n_steps
+        self.labels = labels
+
+        if ax is None:
+            if geo:
+                from dicca.maps import map_axes
+
+                ax = map_axes(extent=extent)
+            else:
+                import matplotlib.pyplot as plt
+
+                _, ax = plt.subplots()
+        self.ax = ax
+        self.fig = ax.figure
+
+        first = self.step(0)
+        if vmin is None:
+            vmin = np.nanmin(first)
+        if vmax is None:
+            vmax = np.nanmax(first)
+        if geo:
+            import cartopy.crs as ccrs
+
+            kwargs.setdefault('transform', ccrs.PlateCarree())
+        # animated artists are left out of the background and drawn on every step
+        self.mesh = ax.pcolormesh(x, y, first, vmin=vmin, vmax=vmax, shading='auto',
+                                  animated=True, **kwargs)
+        self.colorbar = self.fig.colorbar(self.mesh, ax=ax, shrink=0.8) if colorbar else None
+        self.title = ax.set_title('', animated=True)
+        self._background = None
+        self.fig.canvas.mpl_connect('resize_event', self._invalidate)
+
+    def _invalidate(self, *args):
+        self._background = None
+
+    def step(self, i):
+        """Values of step ``i`` as a 2D array"""
+        if self.is_dataarray:
+            return self.field.isel({self.time_dim: i}).values
+        return np.asarray(self.field[i])
+
+    def background(self):
+        """Render everything but the mesh and the title, and keep a copy"""
+        if self._background is None:
+            canvas = self.fig.canvas
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+        return self._background
+
+    def draw(self, i):
+        """Show step ``i``, redrawing only the mesh and the title"""
+        canvas = self.fig.canvas
+        canvas.restore_region(self.background())
+        self.mesh.set_array(self.step(i))
+        self.title.set_text(self.labels[i] if self.labels is not None else '')
+        self.ax.draw_artist(self.mesh)
+        self.ax.draw_artist(self.title)
+        canvas.blit(self.fig.bbox)
+
+    def rgba(self):
+        """Copy of the current frame as a (height, width, 4) uint8 array"""
+        return np.array(self.fig.canvas.buffer_rgba())
+
+    def frames(self, steps=None):
+        """Generator of the RGBA array of each step
+
+        Args:
+            steps: indices of the steps. Default: all
+        """
+        for i in range(self.n_steps) if steps is None else steps:
+            self.draw(i)
+            yield self.rgba()
+
+    def to_buffer(self, steps=None):
+        """All the frames in one (n_frames, height, width, 4) uint8 array"""
+        steps = range(self.n_steps) if steps is None else list(steps)
+        self.background()
+        width, height = self.fig.canvas.get_width_height(physical=True)
+        buffer = np.empty((len(steps), height, width, 4), dtype=np.uint8)
+        for k, i in enumerate(steps):
+            self.draw(i)
+            buffer[k] = self.fig.canvas.buffer_rgba()
+        return buffer
+
+    def save_frames(self, pattern, steps=None):
+        """Write every step to a PNG file
+
+        Args:
+            pattern: file name formatted with the step index, e.g. ``'swh_{:04d}.png'``
+            steps: indices of the steps. Default: all
+
+        Returns:
+            The list of paths written
+        """
+        import matplotlib.image as mpimg
+
+        paths = []
+        for i in range(self.n_steps) if steps is None else steps:
+            self.draw(i)
+            path = pattern.format(i)
+            mpimg.imsave(path, np.asarray(self.fig.canvas.buffer_rgba()))
+            paths.append(path)
+        return paths
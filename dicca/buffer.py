@@ -0,0 +1,107 @@
+"""Typed array buffer with amortized O(1) appends.
+
+``01_quickstart.py`` and ``02_numpy.py`` build arrays by appending to Python
+lists (``b.append(...)`` then ``np.array(b)``) or by growing them with
+``np.vstack``/``np.hstack``, which boxes every value or copies the whole array
+on each step. A ``GrowableArray`` stores the values in a numpy array whose
+capacity grows geometrically, and the final result is a view of the filled
+part, without copying.
+
+Example:
+    >>> buf = GrowableArray(np.float32, row_shape=(3,))
+    >>> for record in records:
+    ...     buf.append(record)
+    >>> buf.extend(block)       # a whole (n, 3) block at once
+    >>> data = buf.view()
+"""
+
+import numpy as np
+
+DEFAULT_CAPACITY = 1024
+GROWTH = 2
+
+
+class GrowableArray:
+    """Append-only array of scalars, fixed-size rows or records
+
+    Args:
+        dtype: dtype of the values, e.g. ``np.float64`` or a structured dtype
+            for records
+        row_shape: shape of each appended item, ``()`` for scalars, ``(k,)``
+            for rows of a 2D array
+        capacity: initial number of items that fit without growing
+    """
+
+    def __init__(self, dtype=np.float64, row_shape=(), capacity=DEFAULT_CAPACITY):
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self._data = np.empty((max(int(capacity), 1),) + self.row_shape, dtype=self.dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return (f'GrowableArray(dtype={self.dtype}, row_shape={self.row_shape}, '
+                f'size={self._size}, capacity={self.capacity})')
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def reserve(self, capacity):
+        """Make room for at least ``capacity`` items"""
+        if capacity > len(self._data):
+            new = np.empty((capacity,) + self.row_shape, dtype=self.dtype)
+            new[:self._size] = self._data[:self._size]
+            self._data = new
+
+    def _grow_for(self, n):
+        needed = self._size + n
+        if needed > len(self._data):
+            self.reserve(max(needed, len(self._data) * GROWTH))
+
+    def append(self, item):
+        """Append one scalar, row or record (a tuple for structured dtypes)"""
+        if self._size == len(self._data):
+            self.reserve(len(self._data) * GROWTH)
+        self._data[self._size] = item
+        self._size += 1
+
+    def extend(self, items):
+        """Append a block of items with one copy
+
+        Args:
+            items: array with shape (n,) + row_shape, or any iterable of items
+        """
+        if not isinstance(items, np.ndarray):
+            items = np.asarray(list(items) if not hasattr(items, '__len__') else items,
+                               dtype=self.dtype)
+        n = len(items)
+        self._grow_for(n)
+        self._data[self._size:self._size + n] = items
+        self._size += n
+
+    def view(self):
+        """The items appended so far, as a view (no copy)
+
+        The view shares memory with the buffer; it stays valid after more
+        appends but does not see them, and it may be overwritten if the
+        buffer is cleared.
+        """
+        return self._data[:self._size]
+
+    def finalize(self):
+        """Release the unused capacity and return the items
+
+        Returns:
+            An array with exactly the appended items. It is a view of the
+            buffer's memory when the buffer is full, a trimmed copy otherwise
+        """
+        if self._size != len(self._data):
+            self._data = self._data[:self._size].copy()
+        return self._data
+
+    def clear(self):
+        """Forget the items, keeping the capacity"""
+        self._size = 0
@@ -0,0 +1,224 @@
+"""Transparent cache of parsed text files.
+
+The lessons parse the same text files again and again (``np.loadtxt`` of
+``data/columns.txt`` and ``data/SIMAR_gaps.txt``, ``np.genfromtxt`` of
+``data/205.csv``, ``pd.read_table`` of ``data_waves.dat``). The loaders below
+parse a file once and store the result in a binary form that is loaded back
+memory-mapped:
+
+* numpy arrays as ``.npy``;
+* DataFrames as Arrow IPC files when pyarrow is installed, pickles otherwise.
+
+An entry is identified by the size, modification time and content hash of the
+source and by the parser arguments, so editing the file or changing the
+arguments parses it again. The hash is only recomputed when the size or the
+modification time change. The cache directory is capped in size and the least
+recently used entries are evicted first.
+
+Example:
+    >>> from dicca import cache
+    >>> data = cache.loadtxt('data/SIMAR_gaps.txt', skiprows=1)
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+from dicca.precision import get_policy
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+CACHE_DIRNAME = '.dicca_cache'
+DEFAULT_MAX_BYTES = 8 * 2**30
+_HASH_BLOCK = 2**24
+
+
+def file_hash(path):
+    """BLAKE2 digest of the content of ``path``, read in blocks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _atomic_write(path, write):
+    """Call ``write(tmp_path)`` and move the result to ``path`` in one step"""
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class ParsedCache:
+    """Size-capped LRU cache of parsed files
+
+    Args:
+        cache_dir: directory of the cache. Default: a ``.dicca_cache`` folder
+            next to each source file
+        max_bytes: maximum size of a cache directory. Least recently used
+            entries are removed when it is exceeded
+        mmap_mode: how cached arrays are mapped, see ``np.load``. The default,
+            ``'c'`` (copy-on-write), allows in-place edits such as
+            ``data[data < 0] = np.nan`` without touching the cache
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, mmap_mode='c'):
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.mmap_mode = mmap_mode
+
+    def directory(self, source):
+        """Cache directory used for ``source``"""
+        return self.cache_dir or Path(source).resolve().parent / CACHE_DIRNAME
+
+    def _source_hash(self, source, directory):
+        """Content hash of ``source``, reusing the last one if size and mtime did not change"""
+        stat = os.stat(source)
+        index_path = directory / 'index.json'
+        try:
+            index = json.loads(index_path.read_text())
+        except (FileNotFoundError, ValueError):
+            index = {}
+
+        name = str(Path(source).resolve())
+        entry = index.get(name)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return stat, entry['hash']
+
+        digest = file_hash(source)
+        index[name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest}
+        _atomic_write(index_path, lambda tmp: tmp.write_text(json.dumps(index)))
+        return stat, digest
+
+    def key(self, source, parser, kwargs):
+        """Cache key of ``source`` parsed by ``parser`` with ``kwargs``"""
+        directory = self.directory(source)
+        directory.mkdir(parents=True, exist_ok=True)
+        stat, digest = self._source_hash(source, directory)
+
+        key = hashlib.blake2b(digest_size=12)
+        key.update(repr((parser, stat.st_size, stat.st_mtime_ns, digest,
+                         sorted(kwargs.items()))).encode())
+        return directory, f'{Path(source).name}-{key.hexdigest()}'
+
+    def get(self, source, parser, parse, kwargs, kind='array'):
+        """Return the cached result of ``parse(source, **kwargs)``, parsing it if needed
+
+        Args:
+            source: path of the text file
+            parser: name of the parser, part of the cache key
+            parse: function that parses the file
+            kwargs: keyword arguments of ``parse``
+            kind: ``'array'`` for numpy results, ``'frame'`` for DataFrames
+
+        Returns:
+            The parsed data
+        """
+        directory, name = self.key(source, parser, kwargs)
+        suffix = '.npy' if kind == 'array' else ('.arrow' if pa is not None else '.pkl')
+        path = directory / (name + suffix)
+
+        if path.exists():
+            os.utime(path)  # mark as recently used
+            return self._read(path)
+
+        result = parse(source, **kwargs)
+        _atomic_write(path, lambda tmp: self._write(tmp, path.suffix, result))
+        self.evict(directory, keep=path)
+        return self._read(path) if kind == 'array' else result
+
+    def _write(self, tmp, suffix, result):
+        if suffix == '.npy':
+            with open(tmp, 'wb') as f:
+                np.save(f, np.asarray(result), allow_pickle=False)
+        elif suffix == '.arrow':
+            table = pa.Table.from_pandas(result, preserve_index=True)
+            with pa.OSFile(str(tmp), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        else:
+            with open(tmp, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _read(self, path):
+        if path.suffix == '.npy':
+            return np.load(path, mmap_mode=self.mmap_mode, allow_pickle=False)
+        if path.suffix == '.arrow':
+            with pa.memory_map(str(path), 'r') as source:
+                return pa.ipc.open_file(source).read_all().to_pandas()
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def entries(self, directory):
+        """Cached files of ``directory``, least recently used first"""
+        files = [p for p in Path(directory).iterdir()
+                 if p.suffix in ('.npy', '.arrow', '.pkl') and not p.name.startswith('.')]
+        return sorted(files, key=lambda p: p.stat().st_mtime)
+
+    def evict(self, directory, keep=None):
+        """Remove least recently used entries until ``directory`` fits in ``max_bytes``
+
+        Args:
+            directory: cache directory
+            keep: entry that is never removed, e.g. the one just written
+        """
+        entries = self.entries(directory)
+        total = sum(p.stat().st_size for p in entries)
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            total -= path.stat().st_size
+            path.unlink()
+
+    def clear(self, directory=None):
+        """Remove every entry of ``directory`` (default: the configured cache directory)"""
+        directory = directory or self.cache_dir
+        if directory is None:
+            raise ValueError('a directory is required when the cache lives next to the sources')
+        for path in self.entries(directory):
+            path.unlink()
+
+
+default_cache = ParsedCache()
+
+
+def loadtxt(fname, cache=None, **kwargs):
+    """Cached ``np.loadtxt``. The result is a memory-mapped array
+
+    Unless ``dtype`` is given, the values are parsed with the float dtype of
+    the current precision policy.
+    """
+    kwargs.setdefault('dtype', get_policy().float_dtype)
+    return (cache or default_cache).get(fname, 'loadtxt', np.loadtxt, kwargs)
+
+
+def genfromtxt(fname, cache=None, **kwargs):
+    """Cached ``np.genfromtxt``. The result is a memory-mapped array
+
+    Unless ``dtype`` is given, the values are parsed with the float dtype of
+    the current precision policy.
+    """
+    kwargs.setdefault('dtype', get_policy().float_dtype)
+    return (cache or default_cache).get(fname, 'genfromtxt', np.genfromtxt, kwargs)
+
+
+def read_table(fname, cache=None, **kwargs):
+    """Cached ``pd.read_table``, with floating columns in the precision policy dtype"""
+    import pandas as pd
+
+    policy = get_policy()
+    parse = lambda path, **kw: policy.cast_frame(pd.read_table(path, **kw))  # noqa: E731
+    return (cache or default_cache).get(fname, f'read_table-{policy.float_dtype}', parse, kwargs,
+                                        kind='frame')
@@ -0,0 +1,32 @@
+"""Clustering of point clouds with scikit-learn, following ``08_sckitlearn_clustering.py``."""
+
+import numpy as np
+from sklearn.cluster import DBSCAN, KMeans, MeanShift
+
+METHODS = {
+    'kmeans': (KMeans, dict(n_clusters=4)),
+    'meanshift': (MeanShift, dict(cluster_all=False, bin_seeding=True, min_bin_freq=10)),
+    'dbscan': (DBSCAN, dict(eps=3, min_samples=10)),
+}
+
+
+def cluster_points(X, method='kmeans', **kwargs):
+    """Cluster the rows of ``X``
+
+    Args:
+        X: array with shape (n_points, n_features)
+        method: one of ``METHODS``
+        **kwargs: override the default parameters of the estimator
+
+    Returns:
+        Tuple ``(labels, centers)``. Points not assigned to any cluster have
+        label -1. ``centers`` is None for methods without cluster centers
+    """
+    try:
+        estimator, defaults = METHODS[method]
+    except KeyError:
+        raise ValueError(f'unknown method {method!r}, use one of {list(METHODS)}') from None
+
+    model = estimator(**{**defaults, **kwargs})
+    labels = model.fit_predict(np.asarray(X))
+    return labels, getattr(model, 'cluster_centers_', None)
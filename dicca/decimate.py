@@ -0,0 +1,221 @@
+"""Decimation of long time series for plotting.
+
+``03_matplotlib.py`` plots ``axs[0].plot(data[:, 4])`` and
+``05b_pandas_timeseries.py`` plots ``df.hs[:10000].plot()`` point by point, so
+decades of hourly data become millions of vertices that no screen or printer
+can resolve. Here the visible part of the series is split into one bucket per
+pixel column and only the first, minimum, maximum and last point of each
+bucket are drawn, which gives the same picture as the full series. ``LTTB``
+(largest triangle three buckets) is available for a lighter line that keeps
+the shape but not every extreme. ``plot_decimated`` redoes the decimation
+whenever the axis is zoomed, panned or resized.
+
+Example:
+    >>> fig, ax = plt.subplots()
+    >>> line = plot_decimated(ax, df.index, df.hs, lw=0.5)
+    >>> fig.savefig('hs.pdf')
+"""
+
+import numpy as np
+
+METHODS = ('minmax', 'lttb')
+
+
+def _as_numeric(x):
+    """``x`` as float64, with datetimes in matplotlib date units"""
+    x = np.asarray(x)
+    if x.dtype.kind == 'M':
+        import matplotlib.dates as mdates
+
+        return mdates.date2num(x)
+    return x.astype(np.float64, copy=False)
+
+
+def _first_in_segment(mask, seg, n_segments):
+    """Index of the first True of ``mask`` in each segment, -1 where there is none"""
+    hits = np.flatnonzero(mask)
+    owner = seg[hits]
+    leading = np.ones(len(hits), dtype=bool)
+    leading[1:] = owner[1:] != owner[:-1]
+    first = np.full(n_segments, -1, dtype=np.intp)
+    first[owner[leading]] = hits[leading]
+    return first
+
+
+def minmax_indices(x, y, n_buckets):
+    """Indices of the points that draw the same line as the whole series
+
+    The range of ``x`` is split into ``n_buckets`` equal intervals, and the
+    first, last, minimum and maximum point of each interval are kept, as well
+    as the first NaN so that gaps still break the line.
+
+    Args:
+        x: increasing abscissae
+        y: values
+        n_buckets: number of intervals, usually the width of the axis in pixels
+
+    Returns:
+        Increasing array of indices into ``y``
+    """
+    x, y = _as_numeric(x), np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= 4 * n_buckets:
+        return np.arange(n)
+
+    edges = np.linspace(x[0], x[-1], int(n_buckets) + 1)
+    starts = np.unique(np.searchsorted(x, edges[:-1], side='left'))
+    starts = starts[starts < n]
+    counts = np.diff(np.append(starts, n))
+    seg = np.repeat(np.arange(len(starts)), counts)
+
+    lo = np.repeat(np.fmin.reduceat(y, starts), counts)
+    hi = np.repeat(np.fmax.reduceat(y, starts), counts)
+    candidates = [
+        starts,
+        starts + counts - 1,
+        _first_in_segment(y == lo, seg, len(starts)),
+        _first_in_segment(y == hi, seg, len(starts)),
+        _first_in_segment(np.isnan(y), seg, len(starts)),
+    ]
+    idx = np.concatenate(candidates)
+    return np.unique(idx[idx >= 0])
+
+
+def lttb_indices(x, y, n_out):
+    """Indices chosen by the largest-triangle-three-buckets algorithm
+
+    The first and last points are kept and, in each of ``n_out - 2`` buckets of
+    equal size, the point that makes the largest triangle with the point kept
+    in the previous bucket and the mean of the next bucket. NaN values are
+    never selected.
+
+    Args:
+        x: increasing abscissae
+        y: values
+        n_out: number of points returned
+
+    Returns:
+        Increasing array of indices into ``y``
+    """
+    x, y = _as_numeric(x), np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    bounds = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    idx = np.empty(n_out, dtype=np.intp)
+    idx[0], idx[-1] = 0, n - 1
+    for i in range(n_out - 2):
+        start, stop = bounds[i], bounds[i + 1]
+        after = slice(stop, bounds[i + 2] if i + 2 < len(bounds) else n)
+        valid = ~np.isnan(y[after])
+        mean_x = x[after].mean()
+        mean_y = y[after][valid].mean() if valid.any() else 0.0
+        ax, ay = x[idx[i]], y[idx[i]]
+        area = np.abs((ax - mean_x) * (y[start:stop] - ay) - (ax - x[start:stop]) * (mean_y - ay))
+        area[np.isnan(area)] = -1
+        idx[i + 1] = start + area.argmax()
+    return idx
+
+
+def decimate(x, y, n, method='minmax'):
+    """Decimated copy of a series
+
+    Args:
+        x: increasing abscissae, numbers or ``datetime64``
+        y: values
+        n: number of buckets for ``'minmax'`` (which returns up to 4 points
+            per bucket), number of points for ``'lttb'``
+        method: one of ``METHODS``
+
+    Returns:
+        Tuple ``(x, y)`` with the selected points
+    """
+    if method not in METHODS:
+        raise ValueError(f'method must be one of {METHODS}, got {method!r}')
+    x, y = np.asarray(x), np.asarray(y)
+    select = minmax_indices if method == 'minmax' else lttb_indices
+    idx = select(x, y, n)
+    return x[idx], y[idx]
+
+
+class DecimatedLine:
+    """Line of an axis that is decimated again on every change of the view
+
+    Use ``plot_decimated`` to create it.
+
+    Args:
+        ax: matplotlib axis
+        x: increasing abscissae, numbers or ``datetime64``
+        y: values
+        method: one of ``METHODS``
+        oversample: buckets per pixel column
+        **kwargs: passed to ``ax.plot``
+    """
+
+    def __init__(self, ax, x, y, method='minmax', oversample=1, **kwargs):
+        if method not in METHODS:
+            raise ValueError(f'method must be one of {METHODS}, got {method!r}')
+        self.ax = ax
+        self.x, self.y = np.asarray(x), np.asarray(y)
+        self._xnum = _as_numeric(self.x)
+        self.method = method
+        self.oversample = oversample
+
+        # the full range sets the data limits, then only the decimated points are kept
+        xs, ys = decimate(self.x, self.y, self.n_buckets(), method)
+        self.line, = ax.plot(xs, ys, **kwargs)
+        ax.update_datalim(np.column_stack([self._xnum[[0, -1]], [np.nanmin(self.y), np.nanmax(self.y)]]))
+        ax.autoscale_view()
+
+        self._cids = [ax.callbacks.connect('xlim_changed', self.update)]
+        if ax.figure.canvas is not None:
+            self._cids.append(ax.figure.canvas.mpl_connect('resize_event', self.update))
+        self.update()
+
+    def n_buckets(self):
+        """Number of buckets across the axis, from its width in pixels"""
+        import matplotlib as mpl
+
+        dpi = mpl.rcParams['savefig.dpi']
+        dpi = max(self.ax.figure.dpi, dpi if dpi != 'figure' else 0)
+        width = self.ax.get_position().width * self.ax.figure.get_figwidth() * dpi
+        return max(int(width * self.oversample), 2)
+
+    def update(self, *args):
+        """Decimate the points in the current x limits of the axis"""
+        lo, hi = sorted(self.ax.get_xlim())
+        # one point beyond each side, so that the line runs to the edges of the axis
+        start = max(np.searchsorted(self._xnum, lo, side='left') - 1, 0)
+        stop = min(np.searchsorted(self._xnum, hi, side='right') + 1, len(self.x))
+        if stop - start < 2:
+            start, stop = 0, len(self.x)
+        xs, ys = decimate(self.x[start:stop], self.y[start:stop], self.n_buckets(), self.method)
+        self.line.set_data(xs, ys)
+        self.ax.figure.canvas.draw_idle()
+
+    def disconnect(self):
+        """Stop following the view of the axis"""
+        self.ax.callbacks.disconnect(self._cids[0])
+        for cid in self._cids[1:]:
+            self.ax.figure.canvas.mpl_disconnect(cid)
+
+
+def plot_decimated(ax, x, y=None, method='minmax', oversample=1, **kwargs):
+    """Plot a long series with at most a few points per pixel column
+
+    Args:
+        ax: matplotlib axis
+        x: increasing abscissae, or a pandas Series when ``y`` is None
+        y: values
+        method: ``'minmax'`` keeps every extreme and looks the same as the
+            full plot; ``'lttb'`` keeps ``oversample`` points per pixel column
+        oversample: buckets per pixel column
+        **kwargs: passed to ``ax.plot``
+
+    Returns:
+        The ``DecimatedLine``; its ``line`` attribute is the ``Line2D``
+    """
+    if y is None:
+        x, y = x.index.values, x.values
+    return DecimatedLine(ax, x, y, method=method, oversample=oversample, **kwargs)
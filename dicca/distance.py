@@ -0,0 +1,133 @@
+"""Euclidean distances between subjects described by several time series.
+
+In ``00_exercise.py`` every mouse is defined by its weight, size and speed at
+each time step, stored as ``(time, subject)`` arrays, and M1 is compared with
+the rest by broadcasting one column against the others. The functions below
+compute the same distance for every pair of subjects at once, working in
+square tiles so that the temporaries never exceed a given memory budget.
+"""
+
+import numpy as np
+
+from dicca._utils import as_float_dtype, chunk_slices
+
+DEFAULT_MEMORY_BUDGET = 256 * 2**20  # bytes
+
+
+def _feature_shape(features):
+    """Check the feature arrays and return their common (time, subject) shape"""
+    if not features:
+        raise ValueError('at least one feature array is required')
+
+    shape = np.shape(features[0])
+    if len(shape) != 2:
+        raise ValueError(f'features must be (time, subject) arrays, got shape {shape}')
+    for var in features[1:]:
+        if np.shape(var) != shape:
+            raise ValueError(f'all features must have shape {shape}, got {np.shape(var)}')
+    return shape
+
+
+def _stack_features(features, dtype):
+    """Return the feature arrays as contiguous ``(subject, time)`` arrays"""
+    _feature_shape(features)
+
+    stacked = []
+    for var in features:
+        # (time, subject) -> contiguous (subject, time) so that a tile row is one block of memory
+        stacked.append(np.ascontiguousarray(np.asarray(var, dtype=dtype).T))
+    return stacked
+
+
+def tile_size(n_time, dtype=np.float64, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Number of subjects per tile side that fits in ``memory_budget``
+
+    Each tile needs an accumulator and a scratch array of
+    ``tile * tile * n_time`` elements.
+
+    Args:
+        n_time: number of time steps
+        dtype: floating dtype of the computation
+        memory_budget: bytes available for the temporaries of one tile
+
+    Returns:
+        The tile side, at least 1
+    """
+    itemsize = np.dtype(dtype).itemsize
+    return max(int(np.sqrt(memory_budget / (2 * n_time * itemsize))), 1)
+
+
+def distance_tiles(*features, memory_budget=DEFAULT_MEMORY_BUDGET, dtype=np.float64,
+                   symmetric=True):
+    """Yield the subject-by-subject distance tensor one tile at a time
+
+    Useful when the full ``(subject, subject, time)`` tensor does not fit in
+    memory and each tile can be reduced or written out as soon as it is built.
+
+    Args:
+        *features: arrays with shape (time, subject), e.g. normalized weight, size and speed
+        memory_budget: bytes available for the temporaries of one tile
+        dtype: floating dtype of the computation. Use ``np.float32`` to halve memory
+        symmetric: only yield tiles on or above the diagonal. The tiles below
+            are the transposes ``tile.transpose(1, 0, 2)``
+
+    Yields:
+        Tuples ``(rows, cols, tile)`` where ``rows`` and ``cols`` are slices of
+        subjects and ``tile`` has shape (len(rows), len(cols), time)
+    """
+    dtype = as_float_dtype(dtype)
+    stacked = _stack_features(features, dtype)
+    n_subject, n_time = stacked[0].shape
+
+    side = tile_size(n_time, dtype, memory_budget)
+    slices = chunk_slices(n_subject, side)
+    acc_buf = np.empty(side * side * n_time, dtype=dtype)
+    tmp_buf = np.empty(side * side * n_time, dtype=dtype)
+
+    for ii, rows in enumerate(slices):
+        for cols in slices[ii if symmetric else 0:]:
+            shape = (rows.stop - rows.start, cols.stop - cols.start, n_time)
+            size = shape[0] * shape[1] * n_time
+            acc = acc_buf[:size].reshape(shape)
+            tmp = tmp_buf[:size].reshape(shape)
+
+            acc[...] = 0
+            for var in stacked:
+                np.subtract(var[rows, np.newaxis, :], var[np.newaxis, cols, :], out=tmp)
+                np.multiply(tmp, tmp, out=tmp)
+                acc += tmp
+            np.sqrt(acc, out=acc)
+            # the buffers are reused by the next tile
+            yield rows, cols, acc.copy()
+
+
+def pairwise_distances(*features, memory_budget=DEFAULT_MEMORY_BUDGET, dtype=np.float64,
+                       out=None):
+    """Euclidean distance between every pair of subjects at every time step
+
+    ``pairwise_distances(weight, size, speed)[0, 1:]`` is the transpose of
+    ``dm1`` in ``00_exercise.py`` when all the mice are compared.
+
+    Args:
+        *features: arrays with shape (time, subject)
+        memory_budget: bytes available for the temporaries of one tile
+        dtype: floating dtype of the computation. Use ``np.float32`` to halve memory
+        out: optional array with shape (subject, subject, time) to store the
+            result, for instance a ``np.memmap`` when the tensor does not fit in memory
+
+    Returns:
+        An array with shape (subject, subject, time)
+    """
+    dtype = as_float_dtype(dtype)
+    n_time, n_subject = _feature_shape(features)
+    shape = (n_subject, n_subject, n_time)
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError(f'out must have shape {shape}, got {out.shape}')
+
+    for rows, cols, tile in distance_tiles(*features, memory_budget=memory_budget, dtype=dtype):
+        out[rows, cols] = tile
+        if rows != cols:
+            out[cols, rows] = tile.transpose(1, 0, 2)
+    return out
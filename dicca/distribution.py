@@ -0,0 +1,205 @@
+"""Distribution summary shared by the histogram, CDF, exceedance and return-period plots.
+
+``03_matplotlib.py`` calls ``plt.hist(hs, bins='auto', density=True)``, then
+``plt.hist(..., cumulative=True)``, then rebuilds the bin centres with
+``bins[0:-1] + np.diff(bins)`` to overlay a line, and every call bins the raw
+data again. A ``Distribution`` sorts the sample once; the bin counts are then
+found with one binary search per edge, and the ECDF, exceedance probability
+and return periods are read from the sorted values. ``summarize`` keeps the
+summary of each series, so that the five views of a report page share it.
+
+Example:
+    >>> fig, axs = plt.subplots(1, 3)
+    >>> plot_hist(axs[0], hs, line=True)
+    >>> plot_cdf(axs[1], hs)
+    >>> plot_return_period(axs[2], annual_maxima(df).hs)
+"""
+
+import weakref
+
+import numpy as np
+
+from dicca.histogram import Histogram
+
+# summaries by id of the series, with a weak reference to check it is still the same object
+_SUMMARIES = {}
+
+
+class Distribution:
+    """Sorted sample and histogram of a series, computed once
+
+    Args:
+        values: sample. NaN values are ignored
+        bins: as in ``np.histogram``: a number of bins, an array of edges or
+            the name of a rule (``'auto'``, ``'fd'``, ...)
+        range: lower and upper limit of the bins
+    """
+
+    def __init__(self, values, bins='auto', range=None):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.sorted = np.sort(values[~np.isnan(values)])
+        self.missing = len(values) - len(self.sorted)
+        self.bins = bins
+        self.range = range
+        self._histograms = {}
+
+    def __len__(self):
+        return len(self.sorted)
+
+    def __repr__(self):
+        return f'Distribution(n={len(self)}, missing={self.missing}, bins={self.bins!r})'
+
+    def histogram(self, bins=None, range=None):
+        """``Histogram`` of the sample, computed once for every binning
+
+        Args:
+            bins: binning rule. Default: the one given to the constructor
+            range: lower and upper limit of the bins
+
+        Returns:
+            A ``Histogram``; it is shared, so copy it before updating it
+        """
+        bins = self.bins if bins is None else bins
+        range = self.range if range is None else range
+        key = (repr(bins), repr(range))
+        if key not in self._histograms:
+            self._histograms[key] = self._bin(np.histogram_bin_edges(self.sorted, bins, range))
+        return self._histograms[key]
+
+    def _bin(self, edges):
+        hist = Histogram(edges)
+        # the last bin includes its right edge, as in np.histogram
+        positions = np.searchsorted(self.sorted, edges, side='left')
+        positions[-1] = np.searchsorted(self.sorted, edges[-1], side='right')
+        hist.counts = np.diff(positions)
+        hist.underflow = int(positions[0])
+        hist.overflow = len(self.sorted) - int(positions[-1])
+        hist.missing = self.missing
+        return hist
+
+    def quantile(self, q):
+        """Quantiles from the sorted sample, as ``np.quantile`` with linear interpolation"""
+        return np.quantile(self.sorted, q) if len(self) else np.full(np.shape(q), np.nan)
+
+    def _subsample(self, max_points, tail):
+        """Indices spread over the ranks, keeping the ``tail`` largest values"""
+        n = len(self)
+        if max_points is None or n <= max_points:
+            return slice(None)
+        idx = np.linspace(0, n - 1, max_points).astype(np.intp)
+        return np.union1d(idx, np.arange(max(n - tail, 0), n))
+
+    def ecdf(self, max_points=None, tail=1000):
+        """Empirical CDF at each value of the sample
+
+        Args:
+            max_points: return about this many points, enough for a plot.
+                Default: all
+            tail: number of largest values always returned
+
+        Returns:
+            Tuple ``(x, prob)`` with the fraction of values <= x
+        """
+        idx = self._subsample(max_points, tail)
+        prob = np.arange(1, len(self) + 1) / len(self)
+        return self.sorted[idx], prob[idx]
+
+    def exceedance(self, max_points=None, tail=1000):
+        """Probability of exceeding each value of the sample
+
+        Uses the Weibull plotting position ``rank / (n + 1)``, with rank 1
+        for the largest value, so that no probability is 0.
+
+        Returns:
+            Tuple ``(x, prob)``
+        """
+        idx = self._subsample(max_points, tail)
+        prob = np.arange(len(self), 0, -1) / (len(self) + 1)
+        return self.sorted[idx], prob[idx]
+
+    def return_period(self, events_per_year=1, max_points=None, tail=1000):
+        """Return period of each value of the sample
+
+        Args:
+            events_per_year: mean number of values per year, 1 for annual
+                maxima, the number of storms per year for peaks over threshold
+
+        Returns:
+            Tuple ``(x, years)``
+        """
+        x, prob = self.exceedance(max_points, tail)
+        return x, 1 / (events_per_year * prob)
+
+
+def summarize(values):
+    """``Distribution`` of ``values``, reused while the same object is alive
+
+    The summary is found by identity, so a series modified in place after the
+    first call must be summarized again with ``Distribution``. Note that
+    ``df.hs`` may return a new Series on every access; keep it in a variable.
+    """
+    if isinstance(values, Distribution):
+        return values
+    key = id(values)
+    cached = _SUMMARIES.get(key)
+    if cached is not None and cached[0]() is values:
+        return cached[1]
+
+    dist = Distribution(values)
+    try:
+        ref = weakref.ref(values, lambda _: _SUMMARIES.pop(key, None))
+    except TypeError:
+        # lists and other objects without weak references are not cached
+        return dist
+    _SUMMARIES[key] = ref, dist
+    return dist
+
+
+def plot_hist(ax, values, density=True, cumulative=False, line=False, bins=None, **kwargs):
+    """Histogram from the cached counts, as ``ax.hist`` draws it
+
+    Args:
+        ax: matplotlib axis
+        values: series or ``Distribution``
+        density: normalize as ``plt.hist(..., density=True)``
+        cumulative: cumulative counts at the right edge of each bin
+        line: draw a line through the bin centres instead of bars
+        bins: binning rule. Default: that of the ``Distribution``, ``'auto'``
+        **kwargs: passed to ``ax.stairs`` or ``ax.plot``
+    """
+    hist = summarize(values).histogram(bins)
+    if cumulative:
+        heights = hist.cumulative(density=density)
+    else:
+        heights = hist.density() if density else hist.counts
+    if line:
+        x = hist.edges[1:] if cumulative else hist.centers
+        return ax.plot(x, heights, **kwargs)
+    kwargs.setdefault('fill', True)
+    return ax.stairs(heights, hist.edges, **kwargs)
+
+
+def plot_cdf(ax, values, max_points=2000, **kwargs):
+    """Empirical CDF as a step line"""
+    x, prob = summarize(values).ecdf(max_points)
+    ax.set_ylabel('P(X <= x)')
+    return ax.step(x, prob, where='post', **kwargs)
+
+
+def plot_exceedance(ax, values, max_points=2000, log=True, **kwargs):
+    """Exceedance probability, on a logarithmic axis by default"""
+    x, prob = summarize(values).exceedance(max_points)
+    if log:
+        ax.set_yscale('log')
+    ax.set_ylabel('P(X > x)')
+    return ax.plot(x, prob, **kwargs)
+
+
+def plot_return_period(ax, values, events_per_year=1, max_points=2000, **kwargs):
+    """Values against their return period in years, on a logarithmic axis"""
+    x, years = summarize(values).return_period(events_per_year, max_points)
+    kwargs.setdefault('marker', '.')
+    kwargs.setdefault('linestyle', 'none')
+    ax.set_xscale('log')
+    ax.set_xlabel('Return period (years)')
+    return ax.plot(years, x, **kwargs)
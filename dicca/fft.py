@@ -0,0 +1,123 @@
+"""FFT backend shared by the spectral code of the package.
+
+``04_scipy.py`` uses the legacy ``scipy.fftpack`` through star imports: full
+complex transforms of real signals, recomputed frequency grids and a single
+thread. The functions here call ``scipy.fft`` with ``rfft``/``irfft`` for real
+data, transform along any axis of a batch (e.g. the time axis of a gridded
+field), and use the number of threads set with ``set_workers``. Frequency
+grids and fast transform lengths are cached per length; the transform plans
+themselves are cached by ``scipy.fft``, so repeated transforms of the same
+length reuse them.
+
+Example:
+    >>> from dicca import fft
+    >>> with fft.use_workers(8):
+    ...     spec = fft.forward(ds.swh.values, axis=0)     # rfft of every grid point
+    >>> freqs = fft.frequencies(ds.sizes['time'], d=3600)
+"""
+
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+from scipy import fft as sp_fft
+
+# -1 uses every CPU, as in scipy.fft
+_workers = 1
+
+
+def get_workers(workers=None):
+    """``workers``, or the current number of threads if None"""
+    return _workers if workers is None else workers
+
+
+def set_workers(workers):
+    """Set the number of threads of the transforms, -1 for one per CPU
+
+    Returns:
+        The previous value
+    """
+    global _workers
+    previous, _workers = _workers, int(workers)
+    return previous
+
+
+@contextmanager
+def use_workers(workers):
+    """Context manager that sets the number of threads and restores it on exit"""
+    previous = set_workers(workers)
+    try:
+        yield _workers
+    finally:
+        set_workers(previous)
+
+
+@lru_cache(maxsize=256)
+def fast_length(n, real=True):
+    """Smallest length >= ``n`` with a fast transform, for zero padding"""
+    return sp_fft.next_fast_len(int(n), real=real)
+
+
+@lru_cache(maxsize=256)
+def _frequencies(n, d, real):
+    freqs = sp_fft.rfftfreq(n, d) if real else sp_fft.fftfreq(n, d)
+    freqs.flags.writeable = False
+    return freqs
+
+
+def frequencies(n, d=1.0, real=True):
+    """Frequencies of the coefficients of a transform of length ``n``
+
+    Args:
+        n: length of the signal
+        d: sampling interval
+        real: frequencies of ``rfft`` (non-negative only) instead of ``fft``
+
+    Returns:
+        A cached, read-only array
+    """
+    return _frequencies(int(n), float(d), bool(real))
+
+
+def forward(x, n=None, axis=-1, workers=None):
+    """Fourier coefficients along ``axis``: ``rfft`` for real input, ``fft`` otherwise
+
+    Args:
+        x: array, transformed independently along ``axis``
+        n: length of the transform; ``x`` is cropped or zero padded
+        axis: axis of the transform
+        workers: threads. Default: the value of ``set_workers``
+    """
+    x = np.asarray(x)
+    transform = sp_fft.fft if np.iscomplexobj(x) else sp_fft.rfft
+    return transform(x, n=n, axis=axis, workers=get_workers(workers))
+
+
+def inverse(coeffs, n=None, axis=-1, real=None, workers=None):
+    """Inverse of ``forward``
+
+    ``rfft`` and ``fft`` coefficients are both complex, so the transform is
+    chosen from their number along ``axis``: ``n // 2 + 1`` for a real signal
+    of length ``n``, ``n`` for a complex one.
+
+    Args:
+        coeffs: Fourier coefficients
+        n: length of the signal, also required to recover an odd length with ``irfft``
+        axis: axis of the transform
+        real: the coefficients are those of a real signal (``irfft``) or not
+            (``ifft``). Default: found from ``n``; it must be given when ``n``
+            is not, or when both kinds have the same number of coefficients
+        workers: threads. Default: the value of ``set_workers``
+    """
+    coeffs = np.asarray(coeffs)
+    if real is None:
+        if n is None:
+            raise ValueError('give the signal length n or real=True/False')
+        size = coeffs.shape[axis]
+        as_real, as_complex = size == n // 2 + 1, size == n
+        if as_real == as_complex:
+            raise ValueError(f'{size} coefficients do not tell a real from a complex signal '
+                             f'of length {n}; give real=True/False')
+        real = as_real
+    transform = sp_fft.irfft if real else sp_fft.ifft
+    return transform(coeffs, n=n, axis=axis, workers=get_workers(workers))
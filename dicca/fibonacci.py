@@ -0,0 +1,119 @@
+"""Fibonacci series without the wasted iterations of the quickstart versions.
+
+``fibonacci`` in ``01_quickstart.py`` grows a list with ``while len(fib) < n``
+and, when ``start`` is given, computes and discards every term below it. Here
+the first term >= ``start`` is located with Binet's formula, the terms are
+obtained by fast doubling in O(log n) and the series continues from there.
+"""
+
+import itertools
+import math
+from functools import lru_cache
+
+PHI = (1 + math.sqrt(5)) / 2
+_LOG_PHI = math.log(PHI)
+_LOG_SQRT5 = 0.5 * math.log(5)
+
+
+def fib_pair(k):
+    """Return ``(F(k), F(k + 1))`` using fast doubling
+
+    Args:
+        k: index of the term, ``F(0) = 0`` and ``F(1) = 1``
+
+    Returns:
+        A tuple with two consecutive Fibonacci numbers
+    """
+    if k < 0:
+        raise ValueError(f'k must be non-negative, got {k}')
+
+    a, b = 0, 1
+    for bit in bin(k)[2:]:
+        # F(2m) = F(m) * (2 F(m+1) - F(m)),  F(2m+1) = F(m)**2 + F(m+1)**2
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        a, b = (d, c + d) if bit == '1' else (c, d)
+    return a, b
+
+
+@lru_cache(maxsize=1024)
+def fib(k):
+    """Return the k-th Fibonacci number in O(log k) operations"""
+    return fib_pair(k)[0]
+
+
+def index_at_least(start):
+    """Index of the first Fibonacci number greater than or equal to ``start``
+
+    The index is estimated from Binet's formula ``F(k) ~ phi**k / sqrt(5)``
+    and then corrected by at most a couple of steps, so it is exact for any
+    integer size.
+
+    Args:
+        start: lower limit
+
+    Returns:
+        The smallest k such that ``F(k) >= start``
+    """
+    if start <= 0:
+        return 0
+    # math.log accepts arbitrarily large ints
+    k = max(int((math.log(start) + _LOG_SQRT5) / _LOG_PHI), 0)
+    a, b = fib_pair(k)
+    while a >= start and k > 0:
+        k -= 1
+        a, b = b - a, a
+    while a < start:
+        k += 1
+        a, b = b, a + b
+    return k
+
+
+def iter_fibonacci(start=0):
+    """Lazy, infinite generator of the Fibonacci series
+
+    Args:
+        start: lower limit. The series begins at the first term >= start
+
+    Yields:
+        Consecutive Fibonacci numbers
+    """
+    a, b = fib_pair(index_at_least(start))
+    while True:
+        yield a
+        a, b = b, a + b
+
+
+@lru_cache(maxsize=256)
+def _fibonacci_cached(n, start):
+    return tuple(itertools.islice(iter_fibonacci(start), n))
+
+
+def fibonacci(n, start=0):
+    """Build a Fibonacci series with n elements starting at start
+
+    Same result as the docstring version in ``01_quickstart.py``. Results are
+    memoized, so repeated calls with the same arguments are free.
+
+    Args:
+        n: number of elements
+        start: lower limit. Default 0
+
+    Returns:
+        A list with a Fibonacci series with n elements
+    """
+    if n < 0:
+        raise ValueError(f'n must be non-negative, got {n}')
+    return list(_fibonacci_cached(n, start))
+
+
+def fibonacci_batch(requests):
+    """Evaluate several ``(n, start)`` requests sharing the memoized results
+
+    Args:
+        requests: iterable of ``(n, start)`` tuples
+
+    Returns:
+        A list with one series per request
+    """
+    return [fibonacci(n, start) for n, start in requests]
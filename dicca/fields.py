@@ -0,0 +1,53 @@
+"""Gridded fields with xarray, following ``06b_xarray_comp.py``."""
+
+import xarray as xr
+
+from dicca.precision import get_policy
+
+
+def monthly_climatology(da, dim='time'):
+    """Mean of each calendar month"""
+    return da.groupby(f'{dim}.month').mean(dim=dim)
+
+
+def monthly_anomaly(da, dim='time'):
+    """Departure of every value from the mean of its calendar month"""
+    gb = da.groupby(f'{dim}.month')
+    return gb - gb.mean(dim=dim)
+
+
+def spatial_mean(da, weights=None, dims=('lat', 'lon')):
+    """Mean over the spatial dimensions, optionally weighted by cell area
+
+    Args:
+        da: DataArray
+        weights: DataArray with the weights, e.g. ``areacello``
+        dims: spatial dimensions
+
+    Returns:
+        A DataArray without the spatial dimensions
+    """
+    if weights is not None:
+        return da.weighted(weights.fillna(0)).mean(dim=list(dims))
+    return da.mean(dim=list(dims))
+
+
+def point_series(da, lat, lon, lat_name='latitude', lon_name='longitude'):
+    """Time series at the grid point nearest to ``(lat, lon)``"""
+    return da.sel({lat_name: lat, lon_name: lon}, method='nearest')
+
+
+def open_field(path, variable=None, **kwargs):
+    """Open a netCDF file and optionally select one variable
+
+    Args:
+        path: netCDF file
+        variable: name of the variable to return. Default: the whole Dataset
+        **kwargs: passed to ``xr.open_dataset``
+
+    Returns:
+        A Dataset or a DataArray, with floating variables in the dtype of the
+        precision policy
+    """
+    ds = get_policy().cast_dataset(xr.open_dataset(path, **kwargs))
+    return ds if variable is None else ds[variable]
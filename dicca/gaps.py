@@ -0,0 +1,167 @@
+"""Detection, classification and filling of gaps in wave time series.
+
+``data/SIMAR_gaps.txt`` contains runs of missing records, which the lessons
+only mask and plot around. Here every run of missing values is found at once
+with run-length encoding, the runs are classified, and the short ones are
+filled by interpolation in a single vectorized call. 2D arrays are processed
+column by column, optionally in parallel threads.
+
+Example:
+    >>> from dicca.gaps import find_gaps, fill_gaps, gap_stats
+    >>> starts, lengths = find_gaps(hs)
+    >>> gap_stats(hs)
+    >>> hs_filled = fill_gaps(hs, max_gap=6)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# gap classes
+SHORT = 0  # interior gap not longer than max_gap, can be filled
+LONG = 1  # interior gap longer than max_gap
+EDGE = 2  # gap at the start or the end of the series, cannot be interpolated
+GAP_CLASSES = {SHORT: 'short', LONG: 'long', EDGE: 'edge'}
+
+
+def missing_mask(x, sentinel=None):
+    """Boolean array, True where ``x`` is NaN or equal to ``sentinel``"""
+    x = np.asarray(x)
+    missing = np.isnan(x) if x.dtype.kind == 'f' else np.zeros(x.shape, dtype=bool)
+    if sentinel is not None:
+        # compare in the dtype of x, so that -99.9 also matches in float32 arrays
+        missing |= x == x.dtype.type(sentinel)
+    return missing
+
+
+def find_gaps(x, sentinel=None):
+    """Start and length of every run of missing values of a 1D series
+
+    Args:
+        x: 1D series, or a boolean array of missing values
+        sentinel: value that means missing, besides NaN
+
+    Returns:
+        Tuple ``(starts, lengths)`` of integer arrays
+    """
+    x = np.asarray(x)
+    missing = x if x.dtype == bool else missing_mask(x, sentinel)
+    # +1 where a run starts, -1 after it ends
+    edges = np.diff(np.concatenate([[0], missing.view(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return starts, ends - starts
+
+
+def classify_gaps(starts, lengths, n, max_gap):
+    """Class of each gap: ``SHORT``, ``LONG`` or ``EDGE``
+
+    Args:
+        starts: start of each gap
+        lengths: length of each gap
+        n: length of the series
+        max_gap: longest gap considered short
+
+    Returns:
+        An array of gap classes
+    """
+    classes = np.where(lengths <= max_gap, SHORT, LONG)
+    edge = (starts == 0) | (starts + lengths == n)
+    return np.where(edge, EDGE, classes)
+
+
+def gap_stats(x, max_gap=None, sentinel=None):
+    """Summary of the gaps of a 1D series
+
+    Args:
+        x: 1D series
+        max_gap: longest gap considered short. If given, the number of gaps of
+            each class is included
+        sentinel: value that means missing, besides NaN
+
+    Returns:
+        A dict with the number of ``gaps``, of ``missing`` values, the
+        ``missing_fraction``, the ``longest`` gap, the ``lengths`` histogram
+        (``lengths[k]`` is the number of gaps of length k) and, with
+        ``max_gap``, the number of ``short``, ``long`` and ``edge`` gaps
+    """
+    x = np.asarray(x)
+    starts, lengths = find_gaps(x, sentinel)
+    stats = {
+        'gaps': len(starts),
+        'missing': int(lengths.sum()),
+        'missing_fraction': lengths.sum() / len(x) if len(x) else np.nan,
+        'longest': int(lengths.max()) if len(lengths) else 0,
+        'lengths': np.bincount(lengths),
+    }
+    if max_gap is not None:
+        classes = np.bincount(classify_gaps(starts, lengths, len(x), max_gap), minlength=3)
+        stats.update({name: int(classes[code]) for code, name in GAP_CLASSES.items()})
+    return stats
+
+
+def fillable_mask(x, max_gap, sentinel=None):
+    """Boolean array, True at the missing values that belong to a short interior gap"""
+    missing = missing_mask(x, sentinel)
+    starts, lengths = find_gaps(missing)
+    short = classify_gaps(starts, lengths, len(missing), max_gap) == SHORT
+
+    # mark the runs with +1 at their start and -1 after their end, then integrate
+    marks = np.zeros(len(missing) + 1, dtype=np.int8)
+    np.add.at(marks, starts[short], 1)
+    np.add.at(marks, starts[short] + lengths[short], -1)
+    return np.cumsum(marks[:-1]).astype(bool)
+
+
+def _fill_1d(x, max_gap, method, t, sentinel):
+    """Fill the short gaps of one series"""
+    x = np.array(x, dtype=np.result_type(x, np.float32))
+    missing = missing_mask(x, sentinel)
+    fill = fillable_mask(x, max_gap, sentinel)
+    if not fill.any():
+        return x
+
+    t = np.arange(len(x)) if t is None else np.asarray(t, dtype=np.float64)
+    known = ~missing
+    if method == 'linear':
+        x[fill] = np.interp(t[fill], t[known], x[known])
+    elif method in ('spline', 'pchip'):
+        from scipy.interpolate import CubicSpline, PchipInterpolator
+
+        interpolator = CubicSpline if method == 'spline' else PchipInterpolator
+        x[fill] = interpolator(t[known], x[known])(t[fill])
+    else:
+        raise ValueError(f"method must be 'linear', 'spline' or 'pchip', got {method!r}")
+    return x
+
+
+def fill_gaps(x, max_gap, method='linear', t=None, sentinel=None, workers=1):
+    """Interpolate the gaps of at most ``max_gap`` missing values
+
+    Gaps that are longer, or at the start or end of the series, are left
+    unchanged.
+
+    Args:
+        x: 1D series, or 2D array with one series per column
+        max_gap: longest gap that is filled
+        method: ``'linear'``, ``'spline'`` (cubic) or ``'pchip'``
+        t: times of the samples, for unevenly spaced series. Default: the index
+        sentinel: value that means missing, besides NaN
+        workers: number of threads used for the columns of a 2D array
+
+    Returns:
+        A filled copy of ``x``
+    """
+    x = np.asarray(x)
+    if x.ndim == 1:
+        return _fill_1d(x, max_gap, method, t, sentinel)
+    if x.ndim != 2:
+        raise ValueError('x must be 1D or 2D')
+
+    fill = lambda col: _fill_1d(col, max_gap, method, t, sentinel)  # noqa: E731
+    if workers > 1:
+        with ThreadPoolExecutor(workers) as pool:
+            columns = list(pool.map(fill, x.T))
+    else:
+        columns = [fill(col) for col in x.T]
+    return np.stack(columns, axis=1)
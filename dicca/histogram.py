@@ -0,0 +1,222 @@
+"""Incremental histograms that can be merged and re-binned.
+
+``numpy.histogram`` in ``02_numpy.py`` and the repeated
+``plt.hist(hs, bins='auto', density=True, cumulative=True)`` calls in
+``03_matplotlib.py`` bin the full array again for every view. A ``Histogram``
+has fixed edges, is updated chunk by chunk, merged with histograms built by
+other workers, and provides the density, cumulative, ECDF and exceedance views
+from its counts alone.
+
+Example:
+    >>> h = Histogram.linear(0, 10, 100)
+    >>> for chunk in chunks:
+    ...     h.update(chunk)
+    >>> x, prob = h.exceedance()
+"""
+
+import numpy as np
+
+
+class Histogram:
+    """Histogram with fixed bin edges
+
+    Values below the first edge or above the last one are counted in
+    ``underflow`` and ``overflow``, and NaN values in ``missing``, so that the
+    cumulative views account for every value seen. As in ``np.histogram`` the
+    last bin includes its right edge.
+
+    Args:
+        edges: increasing bin edges
+        scale: ``'linear'`` or ``'log'`` when the edges are equally spaced
+            in that scale, which allows binning by arithmetic instead of
+            binary search. ``None`` for arbitrary edges
+    """
+
+    def __init__(self, edges, scale=None):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        if self.edges.ndim != 1 or len(self.edges) < 2 or np.any(np.diff(self.edges) <= 0):
+            raise ValueError('edges must be a 1D increasing array with at least two values')
+        if scale not in (None, 'linear', 'log'):
+            raise ValueError(f"scale must be None, 'linear' or 'log', got {scale!r}")
+        self.scale = scale
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        self.missing = 0
+
+    @classmethod
+    def linear(cls, lo, hi, bins):
+        """Histogram with ``bins`` equal bins between ``lo`` and ``hi``"""
+        return cls(np.linspace(lo, hi, bins + 1), scale='linear')
+
+    @classmethod
+    def log(cls, lo, hi, bins):
+        """Histogram with ``bins`` bins equally spaced in log scale between ``lo`` and ``hi``"""
+        if lo <= 0:
+            raise ValueError('the lower limit of a log histogram must be positive')
+        return cls(np.geomspace(lo, hi, bins + 1), scale='log')
+
+    def __repr__(self):
+        return f'Histogram(bins={self.nbins}, range=({self.edges[0]}, {self.edges[-1]}), total={self.total})'
+
+    @property
+    def nbins(self):
+        return len(self.counts)
+
+    @property
+    def centers(self):
+        """Centre of each bin (geometric centre for log bins)"""
+        if self.scale == 'log':
+            return np.sqrt(self.edges[:-1] * self.edges[1:])
+        return 0.5 * (self.edges[:-1] + self.edges[1:])
+
+    @property
+    def widths(self):
+        return np.diff(self.edges)
+
+    @property
+    def total(self):
+        """Number of non-missing values seen, including those out of range"""
+        return int(self.counts.sum()) + self.underflow + self.overflow
+
+    def _bin_index(self, values):
+        """Bin of each in-range value"""
+        if self.scale is None:
+            idx = np.searchsorted(self.edges, values, side='right') - 1
+        else:
+            lo, hi = self.edges[0], self.edges[-1]
+            scaled = values
+            if self.scale == 'log':
+                scaled, lo, hi = np.log(values), np.log(lo), np.log(hi)
+            idx = ((scaled - lo) * (self.nbins / (hi - lo))).astype(np.intp)
+            idx = np.clip(idx, 0, self.nbins - 1)
+            # rounding can put a value that sits on an edge in the neighbouring bin
+            idx -= values < self.edges[idx]
+            idx += values >= self.edges[idx + 1]
+        return np.clip(idx, 0, self.nbins - 1)
+
+    def update(self, values):
+        """Add a chunk of values
+
+        Returns:
+            The histogram itself, so that calls can be chained
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        nan = np.isnan(values)
+        self.missing += int(nan.sum())
+        values = values[~nan]
+
+        below = values < self.edges[0]
+        above = values > self.edges[-1]
+        self.underflow += int(below.sum())
+        self.overflow += int(above.sum())
+
+        inside = values[~(below | above)]
+        self.counts += np.bincount(self._bin_index(inside), minlength=self.nbins)
+        return self
+
+    def merge(self, other):
+        """Add the counts of a histogram with the same edges
+
+        Returns:
+            The histogram itself
+        """
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError('cannot merge histograms with different edges')
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self.missing += other.missing
+        return self
+
+    def __add__(self, other):
+        return self.copy().merge(other)
+
+    def copy(self):
+        result = Histogram(self.edges, self.scale)
+        result.merge(self)
+        return result
+
+    def rebin(self, edges):
+        """Histogram on coarser edges, without going back to the data
+
+        Args:
+            edges: new edges, which must be a subset of the current ones, or an
+                integer factor to merge that many consecutive bins
+
+        Returns:
+            A new ``Histogram``
+        """
+        scale = None
+        if np.ndim(edges) == 0:
+            factor = int(edges)
+            positions = np.arange(0, self.nbins + 1, factor)
+            if positions[-1] != self.nbins:
+                positions = np.append(positions, self.nbins)
+            elif self.scale is not None:
+                scale = self.scale
+        else:
+            edges = np.asarray(edges, dtype=np.float64)
+            positions = np.minimum(np.searchsorted(self.edges, edges), self.nbins)
+            # accept edges that differ from the current ones by rounding only
+            below = np.maximum(positions - 1, 0)
+            closer = np.abs(self.edges[below] - edges) < np.abs(self.edges[positions] - edges)
+            positions = np.where(closer, below, positions)
+            if not np.allclose(self.edges[positions], edges, rtol=1e-9, atol=0):
+                raise ValueError('the new edges must be a subset of the current edges')
+
+        result = Histogram(self.edges[positions], scale)
+        result.counts = np.add.reduceat(self.counts[:positions[-1]], positions[:-1])
+        # values between the old and the new outer edges become out of range
+        result.underflow = self.underflow + int(self.counts[:positions[0]].sum())
+        result.overflow = self.overflow + int(self.counts[positions[-1]:].sum())
+        result.missing = self.missing
+        return result
+
+    def density(self):
+        """Probability density of each bin, as ``np.histogram(..., density=True)``"""
+        inside = self.counts.sum()
+        if inside == 0:
+            return np.zeros(self.nbins)
+        return self.counts / (inside * self.widths)
+
+    def cumulative(self, density=True):
+        """Cumulative counts at the right edge of each bin
+
+        Args:
+            density: normalize by the number of values in range, as
+                ``plt.hist(..., density=True, cumulative=True)``
+
+        Returns:
+            An array with one value per bin
+        """
+        cum = np.cumsum(self.counts)
+        if density:
+            return cum / cum[-1] if cum[-1] else np.zeros(self.nbins)
+        return cum
+
+    def ecdf(self):
+        """Empirical CDF at the edges, counting the values out of range
+
+        A value equal to an inner edge is counted in the bin to its right, so
+        the counts only give ``P(X < edge)``; at the last edge, which the last
+        bin includes, the result is ``P(X <= edge)``.
+
+        Returns:
+            Tuple ``(edges, prob)`` with the fraction of values below each edge
+        """
+        total = self.total
+        cum = self.underflow + np.concatenate([[0], np.cumsum(self.counts)])
+        return self.edges, cum / total if total else np.zeros(len(self.edges))
+
+    def exceedance(self):
+        """Probability of reaching each edge, ``1 - ecdf``
+
+        That is ``P(X >= edge)`` at the inner edges and ``P(X > edge)`` at the
+        last one.
+
+        Returns:
+            Tuple ``(edges, prob)``
+        """
+        edges, prob = self.ecdf()
+        return edges, 1 - prob if self.total else prob
@@ -0,0 +1,80 @@
+"""Startup-time report of the package submodules.
+
+Each submodule is imported in a fresh interpreter with ``python -X importtime``
+so that the measurement includes every dependency it pulls in, as it would in
+a short batch process. Usage::
+
+    python -m dicca.importtime [submodule ...]
+"""
+
+import subprocess
+import sys
+
+
+def import_time(module, python=sys.executable):
+    """Cumulative import time of ``module`` in a fresh interpreter
+
+    Args:
+        module: dotted module name
+        python: interpreter used for the measurement
+
+    Returns:
+        Tuple ``(seconds, slowest)`` with the cumulative time and a list of the
+        ``(seconds, module)`` imported by ``module``, slowest first. Modules
+        loaded by the interpreter at startup are not included
+    """
+    proc = subprocess.run([python, '-X', 'importtime', '-c', f'import {module}'],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise ImportError(proc.stderr.strip().splitlines()[-1])
+
+    timings = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package, indented by nesting level
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        timings.append((int(cumulative) / 1e6, name.strip(), level))
+
+    # a module is reported after the modules it imports, which are indented deeper
+    last = max(i for i, (_, name, _) in enumerate(timings) if name == module)
+    total, _, level = timings[last]
+    first = last
+    while first > 0 and timings[first - 1][2] > level:
+        first -= 1
+    nested = [(t, name) for t, name, _ in timings[first:last]]
+    return total, sorted(nested, reverse=True)
+
+
+def startup_report(modules=None, top=3, file=sys.stdout):
+    """Print the import time of the package and of each submodule
+
+    Args:
+        modules: submodule names. Default: all of ``dicca.__all__``
+        top: number of slowest dependencies listed for every submodule
+        file: stream where the report is written
+
+    Returns:
+        A dict ``{module: seconds}``. Modules that fail to import get ``None``
+    """
+    import dicca
+
+    modules = ['dicca'] + [f'dicca.{name}' for name in (modules or dicca.__all__)]
+    report = {}
+    for module in modules:
+        try:
+            total, slowest = import_time(module)
+        except ImportError as err:
+            report[module] = None
+            print(f'{module:<20} not available ({err})', file=file)
+            continue
+
+        report[module] = total
+        deps = ', '.join(f'{name} {t:.3f}s' for t, name in slowest[:top])
+        print(f'{module:<20} {total:8.3f}s   {deps}', file=file)
+    return report
+
+
+if __name__ == '__main__':
+    startup_report(sys.argv[1:] or None)
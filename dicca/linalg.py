@@ -0,0 +1,143 @@
+"""Linear algebra on stacks of small matrices.
+
+``02_numpy.py`` and ``04_scipy.py`` call ``solve``, ``inv``, ``det``, ``eig``,
+``eigvals`` and ``norm`` on one 3x3 matrix at a time. When there is one small
+system per grid cell, the Python overhead of each call is larger than the
+arithmetic. The functions below take stacks of matrices with shape
+(N, k, k), process them with numpy's vectorized LAPACK loops in chunks of
+bounded size, optionally in a thread pool, and use closed forms for the
+determinant of 2x2 and 3x3 matrices.
+
+Example:
+    >>> A = np.random.rand(10**6, 3, 3)
+    >>> b = np.random.rand(10**6, 3)
+    >>> x = solve(A, b)        # one solution per matrix
+    >>> d = det(A)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from dicca._utils import chunk_slices
+
+DEFAULT_CHUNK = 2**16  # matrices per chunk
+
+
+def _check_stack(A):
+    A = np.asarray(A)
+    if A.ndim != 3 or A.shape[1] != A.shape[2]:
+        raise ValueError(f'A must be a stack of square matrices (N, k, k), got shape {A.shape}')
+    return A
+
+
+def _batched(func, arrays, chunk=DEFAULT_CHUNK, workers=1):
+    """Apply ``func`` to matching chunks of ``arrays`` along the first axis
+
+    Returns:
+        The concatenated results. If ``func`` returns tuples, a tuple of arrays
+    """
+    slices = chunk_slices(len(arrays[0]), chunk) or [slice(0, 0)]
+    call = lambda rows: func(*(a[rows] for a in arrays))  # noqa: E731
+    if workers > 1 and len(slices) > 1:
+        with ThreadPoolExecutor(workers) as pool:
+            parts = list(pool.map(call, slices))
+    else:
+        parts = [call(rows) for rows in slices]
+
+    if isinstance(parts[0], tuple):
+        return tuple(np.concatenate(p) for p in zip(*parts))
+    return np.concatenate(parts)
+
+
+def solve(A, b, chunk=DEFAULT_CHUNK, workers=1):
+    """Solve ``A[i] @ x[i] = b[i]`` for every matrix of the stack
+
+    Args:
+        A: array with shape (N, k, k)
+        b: right-hand sides with shape (N, k), or (N, k, m) for several per matrix
+        chunk: matrices per chunk, bounds the memory of the temporaries
+        workers: number of threads
+
+    Returns:
+        An array with the shape of ``b``
+    """
+    A = _check_stack(A)
+    b = np.asarray(b)
+    vector = b.ndim == 2
+    if vector:
+        b = b[..., np.newaxis]
+    x = _batched(np.linalg.solve, (A, b), chunk, workers)
+    return x[..., 0] if vector else x
+
+
+def inv(A, chunk=DEFAULT_CHUNK, workers=1):
+    """Inverse of every matrix of a (N, k, k) stack"""
+    return _batched(np.linalg.inv, (_check_stack(A),), chunk, workers)
+
+
+def _det_small(A):
+    """Closed-form determinant of 1x1, 2x2 and 3x3 matrices"""
+    k = A.shape[-1]
+    if k == 1:
+        return A[:, 0, 0].copy()
+    if k == 2:
+        return A[:, 0, 0] * A[:, 1, 1] - A[:, 0, 1] * A[:, 1, 0]
+    return (A[:, 0, 0] * (A[:, 1, 1] * A[:, 2, 2] - A[:, 1, 2] * A[:, 2, 1])
+            - A[:, 0, 1] * (A[:, 1, 0] * A[:, 2, 2] - A[:, 1, 2] * A[:, 2, 0])
+            + A[:, 0, 2] * (A[:, 1, 0] * A[:, 2, 1] - A[:, 1, 1] * A[:, 2, 0]))
+
+
+def det(A, chunk=DEFAULT_CHUNK, workers=1):
+    """Determinant of every matrix of a (N, k, k) stack"""
+    A = _check_stack(A)
+    func = _det_small if A.shape[-1] <= 3 else np.linalg.det
+    return _batched(func, (A,), chunk, workers)
+
+
+def slogdet(A, chunk=DEFAULT_CHUNK, workers=1):
+    """Sign and log-determinant of every matrix, safe from overflow
+
+    Returns:
+        Tuple ``(sign, logabsdet)``
+    """
+    return _batched(lambda a: tuple(np.linalg.slogdet(a)), (_check_stack(A),), chunk, workers)
+
+
+def eig(A, chunk=DEFAULT_CHUNK, workers=1):
+    """Eigenvalues and right eigenvectors of every matrix
+
+    Returns:
+        Tuple ``(evals, evecs)`` with shapes (N, k) and (N, k, k). The
+        eigenvectors are the columns of ``evecs[i]``
+    """
+    return _batched(lambda a: tuple(np.linalg.eig(a)), (_check_stack(A),), chunk, workers)
+
+
+def eigvals(A, chunk=DEFAULT_CHUNK, workers=1):
+    """Eigenvalues of every matrix, with shape (N, k)"""
+    return _batched(np.linalg.eigvals, (_check_stack(A),), chunk, workers)
+
+
+def eigh(A, chunk=DEFAULT_CHUNK, workers=1):
+    """Eigenvalues (ascending) and eigenvectors of every symmetric matrix"""
+    return _batched(lambda a: tuple(np.linalg.eigh(a)), (_check_stack(A),), chunk, workers)
+
+
+def cholesky(A, chunk=DEFAULT_CHUNK, workers=1):
+    """Lower Cholesky factor of every symmetric positive-definite matrix"""
+    return _batched(np.linalg.cholesky, (_check_stack(A),), chunk, workers)
+
+
+def norm(A, ord=None, chunk=DEFAULT_CHUNK, workers=1):
+    """Matrix norm of every matrix, as ``norm(A, ord)`` in ``04_scipy.py``
+
+    Args:
+        A: array with shape (N, k, k)
+        ord: order of the norm. Default: Frobenius
+
+    Returns:
+        An array with shape (N,)
+    """
+    func = lambda a: np.linalg.norm(a, ord=ord, axis=(-2, -1))  # noqa: E731
+    return _batched(func, (_check_stack(A),), chunk, workers)
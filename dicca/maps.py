@@ -0,0 +1,42 @@
+"""Geo-referenced axes with cartopy, following ``06_pythia_cartopy.py``."""
+
+import cartopy.crs as ccrs
+import cartopy.feature as cfeature
+import matplotlib.pyplot as plt
+
+FEATURES = {
+    'borders': (cfeature.BORDERS, dict(linewidth=0.5, edgecolor='black')),
+    'states': (cfeature.STATES, dict(linewidth=0.3, edgecolor='brown')),
+    'land': (cfeature.LAND, dict(facecolor='lightgray')),
+}
+
+
+def map_axes(projection=None, extent=None, features=('borders',), resolution='110m',
+             gridlines=True, ax=None, figsize=(11, 8.5)):
+    """Create a GeoAxes with coastlines and the usual decorations
+
+    Args:
+        projection: cartopy projection. Default: ``ccrs.PlateCarree()``
+        extent: ``[lonW, lonE, latS, latN]`` in PlateCarree coordinates
+        features: names of ``FEATURES`` to add
+        resolution: resolution of the coastlines
+        gridlines: draw labelled gridlines
+        ax: existing GeoAxes to decorate instead of creating a new figure
+        figsize: size of the new figure
+
+    Returns:
+        The GeoAxes
+    """
+    if ax is None:
+        fig = plt.figure(figsize=figsize)
+        ax = fig.add_subplot(1, 1, 1, projection=projection or ccrs.PlateCarree())
+
+    if extent is not None:
+        ax.set_extent(extent, crs=ccrs.PlateCarree())
+    ax.coastlines(resolution=resolution, color='black')
+    for name in features:
+        feature, style = FEATURES[name]
+        ax.add_feature(feature, **style)
+    if gridlines:
+        ax.gridlines(draw_labels=True, linewidth=1, color='gray', alpha=0.5, linestyle='--')
+    return ax
@@ -0,0 +1,221 @@
+"""Columns with missing data stored as a packed validity bitmask.
+
+The lessons mark gaps with ``data[data < 0] = np.NaN`` or ``y[mm] = np.nan``,
+which forces every column to float64, and then build boolean masks such as
+``np.isnan(hs)`` again for every operation. A ``MaskedColumn`` keeps the values
+in their compact dtype (e.g. int16 or float32) and the validity as one bit per
+value. Integer columns can hold scaled values, e.g. centimetres for a wave
+height, and are decoded by the reductions and fills. Reductions, filters and
+fills walk the bitmask block by block, so they never allocate full-size
+temporaries.
+
+Example:
+    >>> hs = MaskedColumn.from_sentinel(data[:, 4], sentinel=-99.9, dtype=np.float32)
+    >>> hs.mean(), hs.max()
+    >>> hs16 = MaskedColumn.from_sentinel(data[:, 4], sentinel=-99.9, dtype=np.int16, scale=0.01)
+    >>> hs.fill(0)
+"""
+
+import numpy as np
+
+from dicca._utils import chunk_slices
+from dicca.precision import encode
+
+BLOCK = 2**16  # values per block, a multiple of 8 so that blocks start on a byte
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(axis=1)
+
+
+def pack_mask(valid):
+    """Pack a boolean array into one bit per value"""
+    return np.packbits(np.asarray(valid, dtype=bool), bitorder='little')
+
+
+class MaskedColumn:
+    """1D values with a packed validity bitmask
+
+    Args:
+        values: 1D array, kept with its dtype (no copy if it is already an array)
+        valid: boolean array, True where the value is present. Default: all
+            present, or not NaN for floating values
+        scale: the values stand for ``values * scale + offset``
+        offset: see ``scale``
+    """
+
+    def __init__(self, values, valid=None, scale=1.0, offset=0.0):
+        self.values = np.asarray(values)
+        if self.values.ndim != 1:
+            raise ValueError('values must be 1D')
+        if not scale > 0:
+            raise ValueError(f'scale must be positive, got {scale}')
+        self.scale = float(scale)
+        self.offset = float(offset)
+        if valid is None:
+            valid = ~np.isnan(self.values) if self.values.dtype.kind == 'f' else np.ones(len(self), bool)
+        elif len(valid) != len(self.values):
+            raise ValueError('values and valid must have the same length')
+        self.bits = pack_mask(valid)
+
+    @classmethod
+    def from_sentinel(cls, values, sentinel=None, below=None, dtype=None, scale=None, offset=0.0):
+        """Build a column marking sentinel or out-of-range values as missing
+
+        Args:
+            values: 1D array
+            sentinel: value that means missing, e.g. -99.9
+            below: values lower than this are missing, as ``data[data < 0] = np.nan``
+            dtype: dtype used to store the values, e.g. ``np.float32`` or ``np.int16``
+            scale: with an integer ``dtype``, store ``round((values - offset) / scale)``,
+                e.g. 0.01 to keep centimetres. Default: 1 when floating values
+                are stored as integers
+            offset: see ``scale``
+
+        Returns:
+            A ``MaskedColumn``
+        """
+        values = np.asarray(values)
+        valid = np.ones(len(values), dtype=bool)
+        if values.dtype.kind == 'f':
+            valid &= ~np.isnan(values)
+        if sentinel is not None:
+            valid &= values != sentinel
+        if below is not None:
+            valid &= ~(values < below)
+
+        dtype = values.dtype if dtype is None else np.dtype(dtype)
+        if dtype.kind not in 'iu' or (values.dtype.kind != 'f' and scale is None and offset == 0):
+            return cls(values.astype(dtype, copy=False), valid)
+
+        scale = 1.0 if scale is None else scale
+        # missing slots hold 0, so that NaN and sentinels are never cast
+        encoded = encode(np.where(valid, values, np.nan), scale, offset, dtype, missing=0)
+        return cls(encoded, valid, scale, offset)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        scaled = f', scale={self.scale:g}, offset={self.offset:g}' if self.scaled else ''
+        return f'MaskedColumn(dtype={self.values.dtype}, length={len(self)}, valid={self.count()}{scaled})'
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def scaled(self):
+        """Whether the stored values are decoded with a scale or offset"""
+        return self.scale != 1 or self.offset != 0
+
+    def _decode(self, values):
+        return values * self.scale + self.offset if self.scaled else values
+
+    @property
+    def nbytes(self):
+        """Memory used by the values and the bitmask"""
+        return self.values.nbytes + self.bits.nbytes
+
+    @property
+    def valid(self):
+        """Validity as a boolean array (allocates one byte per value)"""
+        return np.unpackbits(self.bits, count=len(self), bitorder='little').view(bool)
+
+    def blocks(self):
+        """Iterate over ``(slice, values, valid)`` blocks of at most ``BLOCK`` values"""
+        for rows in chunk_slices(len(self), BLOCK):
+            bits = self.bits[rows.start // 8:(rows.stop + 7) // 8]
+            valid = np.unpackbits(bits, count=rows.stop - rows.start, bitorder='little').view(bool)
+            yield rows, self.values[rows], valid
+
+    def count(self):
+        """Number of valid values"""
+        # padding bits of the last byte are always 0
+        return int(_POPCOUNT[self.bits].sum())
+
+    def sum(self, dtype=np.float64):
+        """Sum of the valid values"""
+        total = dtype(sum(block[valid].sum(dtype=dtype) for _, block, valid in self.blocks()))
+        return dtype(total * self.scale + self.offset * self.count()) if self.scaled else total
+
+    def mean(self):
+        """Mean of the valid values"""
+        count = self.count()
+        return self.sum() / count if count else np.nan
+
+    def var(self, ddof=0):
+        """Variance of the valid values"""
+        count = self.count()
+        if count - ddof <= 0:
+            return np.nan
+        mean = self.mean()
+        m2 = sum(((self._decode(block[valid]) - mean)**2).sum() for _, block, valid in self.blocks())
+        return m2 / (count - ddof)
+
+    def std(self, ddof=0):
+        """Standard deviation of the valid values"""
+        return np.sqrt(self.var(ddof))
+
+    def min(self):
+        """Smallest valid value"""
+        mins = [block[valid].min() for _, block, valid in self.blocks() if valid.any()]
+        return self._decode(min(mins)) if mins else np.nan
+
+    def max(self):
+        """Largest valid value"""
+        maxs = [block[valid].max() for _, block, valid in self.blocks() if valid.any()]
+        return self._decode(max(maxs)) if maxs else np.nan
+
+    def argmax(self):
+        """Position of the largest valid value, -1 if there is none"""
+        best, pos = None, -1
+        for rows, block, valid in self.blocks():
+            if valid.any():
+                idx = np.flatnonzero(valid)[block[valid].argmax()]
+                if best is None or block[idx] > best:
+                    best, pos = block[idx], rows.start + idx
+        return pos
+
+    def where(self, condition):
+        """Column whose values not meeting ``condition`` are marked as missing
+
+        Args:
+            condition: function of a block of values returning a boolean array,
+                e.g. ``lambda v: (v > 1) & (v < 5)``
+
+        Returns:
+            A new ``MaskedColumn`` sharing the values
+        """
+        result = MaskedColumn.__new__(MaskedColumn)
+        result.values = self.values
+        result.scale, result.offset = self.scale, self.offset
+        result.bits = np.empty_like(self.bits)
+        for rows, block, valid in self.blocks():
+            keep = valid & condition(self._decode(block))
+            result.bits[rows.start // 8:(rows.stop + 7) // 8] = pack_mask(keep)
+        return result
+
+    def compressed(self):
+        """Array with the valid values only"""
+        return self._decode(np.concatenate([block[valid] for _, block, valid in self.blocks()] or
+                                           [self.values[:0]]))
+
+    def fill(self, value, dtype=None):
+        """Array where the missing values are replaced with ``value``
+
+        Args:
+            value: fill value, e.g. 0 as in ``hs[np.isnan(hs)] = 0``
+            dtype: dtype of the result. Default: the dtype of the values, or
+                float64 for scaled values
+
+        Returns:
+            A new array
+        """
+        if dtype is None:
+            dtype = np.float64 if self.scaled else self.values.dtype
+        out = np.array(self._decode(self.values), dtype=dtype)
+        for rows, _, valid in self.blocks():
+            out[rows][~valid] = value
+        return out
+
+    def to_float(self, dtype=np.float64):
+        """Float array with NaN in place of the missing values"""
+        return self.fill(np.nan, dtype=dtype)
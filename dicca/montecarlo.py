@@ -0,0 +1,159 @@
+"""Reproducible parallel random numbers for Monte Carlo runs.
+
+``02_numpy.py`` draws ``rnd.normal(loc=0, scale=1, size=1000000)`` and
+``04_scipy.py`` calls ``X.rvs(size=1000)`` from the global legacy
+``RandomState``, in a single thread. Here the output array is split into
+blocks of fixed size, every block gets its own ``np.random.Generator`` spawned
+from a ``SeedSequence``, and the blocks are filled in place by a thread pool.
+Because the streams depend on the block index and not on the thread that
+fills it, the result is bit-identical for a given seed and block size whatever
+the number of workers.
+
+Example:
+    >>> g = normal(10**8, loc=0, scale=1, seed=1234, workers=8)
+    >>> samples = rvs(stats.poisson(3.5), 10**6, seed=1)
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from dicca._utils import chunk_slices
+from dicca.precision import get_policy
+
+DEFAULT_BLOCK = 2**20
+
+
+def spawn_generators(seed, n):
+    """``n`` independent generators derived from ``seed``
+
+    Args:
+        seed: integer, ``SeedSequence`` or None for fresh entropy
+        n: number of generators
+
+    Returns:
+        A list of ``np.random.Generator``
+    """
+    ss = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return [np.random.Generator(np.random.PCG64(child)) for child in ss.spawn(n)]
+
+
+def _draw_block(gen, method, out, params):
+    """Fill ``out`` with draws of ``method``, in place when numpy allows it"""
+    if method == 'normal':
+        gen.standard_normal(out=out, dtype=out.dtype)
+        out *= params.get('scale', 1.0)
+        out += params.get('loc', 0.0)
+    elif method == 'uniform':
+        gen.random(out=out, dtype=out.dtype)
+        low, high = params.get('low', 0.0), params.get('high', 1.0)
+        out *= high - low
+        out += low
+    elif method == 'exponential':
+        gen.standard_exponential(out=out, dtype=out.dtype)
+        out *= params.get('scale', 1.0)
+    elif method in ('standard_normal', 'random', 'standard_exponential'):
+        getattr(gen, method)(out=out, dtype=out.dtype)
+    else:
+        out[...] = getattr(gen, method)(size=out.shape, **params)
+
+
+def parallel_fill(out, method='standard_normal', seed=None, block=DEFAULT_BLOCK,
+                  workers=None, **params):
+    """Fill ``out`` with random draws, in parallel and reproducibly
+
+    Args:
+        out: array to fill. Filled along its flattened (C order) view
+        method: name of a ``np.random.Generator`` method, e.g. ``'normal'``,
+            ``'uniform'``, ``'exponential'``, ``'poisson'``, ``'gamma'``
+        seed: integer, ``SeedSequence`` or None for fresh entropy
+        block: number of values drawn from each stream. The result depends on
+            it, so keep it fixed to reproduce a run
+        workers: number of threads. Default: one per CPU. It does not change the result
+        **params: parameters of the distribution, e.g. ``loc`` and ``scale``
+
+    Returns:
+        ``out``
+    """
+    flat = out.reshape(-1)
+    if not np.shares_memory(flat, out):
+        raise ValueError('out must be contiguous')
+
+    slices = chunk_slices(flat.size, block)
+    generators = spawn_generators(seed, len(slices))
+    tasks = lambda i: _draw_block(generators[i], method, flat[slices[i]], params)  # noqa: E731
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(slices) > 1:
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(tasks, range(len(slices))))
+    else:
+        for i in range(len(slices)):
+            tasks(i)
+    return out
+
+
+def normal(size, loc=0.0, scale=1.0, seed=None, dtype=None, **kwargs):
+    """Normal draws, as ``rnd.normal(loc, scale, size)`` but in parallel
+
+    The dtype defaults to the float dtype of the precision policy.
+    """
+    out = np.empty(size, dtype=get_policy().float_dtype if dtype is None else dtype)
+    return parallel_fill(out, 'normal', seed, loc=loc, scale=scale, **kwargs)
+
+
+def uniform(size, low=0.0, high=1.0, seed=None, dtype=None, **kwargs):
+    """Uniform draws, as ``np.random.uniform(low, high, size)`` but in parallel
+
+    The dtype defaults to the float dtype of the precision policy.
+    """
+    out = np.empty(size, dtype=get_policy().float_dtype if dtype is None else dtype)
+    return parallel_fill(out, 'uniform', seed, low=low, high=high, **kwargs)
+
+
+def rvs(dist, size, seed=None, block=DEFAULT_BLOCK, workers=None):
+    """Draws from a frozen ``scipy.stats`` distribution, in parallel
+
+    Args:
+        dist: frozen distribution, e.g. ``stats.poisson(3.5)``
+        size: number of draws
+        seed: integer, ``SeedSequence`` or None
+        block: number of values drawn from each stream
+        workers: number of threads. It does not change the result
+
+    Returns:
+        A 1D array
+    """
+    first = dist.rvs(size=1, random_state=np.random.default_rng(0))
+    out = np.empty(size, dtype=np.asarray(first).dtype)
+    slices = chunk_slices(size, block)
+    generators = spawn_generators(seed, len(slices))
+
+    def draw(i):
+        out[slices[i]] = dist.rvs(size=slices[i].stop - slices[i].start, random_state=generators[i])
+
+    with ThreadPoolExecutor(workers or os.cpu_count() or 1) as pool:
+        list(pool.map(draw, range(len(slices))))
+    return out
+
+
+def bootstrap(x, statistic, n_resamples, seed=None, workers=None):
+    """Bootstrap distribution of ``statistic``
+
+    Args:
+        x: 1D sample
+        statistic: function of a 1D array, e.g. ``np.median``
+        n_resamples: number of resamples
+        seed: integer, ``SeedSequence`` or None. Resample ``i`` always uses
+            the same stream, so the result does not depend on ``workers``
+        workers: number of threads
+
+    Returns:
+        An array with the statistic of every resample
+    """
+    x = np.asarray(x)
+    generators = spawn_generators(seed, n_resamples)
+    resample = lambda gen: statistic(x[gen.integers(0, len(x), len(x))])  # noqa: E731
+    with ThreadPoolExecutor(workers or os.cpu_count() or 1) as pool:
+        return np.array(list(pool.map(resample, generators)))
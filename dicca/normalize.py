@@ -0,0 +1,170 @@
+"""Standardization of arrays that are read in chunks.
+
+``np_normalize_var`` in ``00_exercise.py`` computes ``np.mean`` and ``np.std``
+separately and then allocates a normalized copy. Here the mean and variance
+are accumulated in one pass with Welford/Chan running statistics, partial
+results computed on different chunks (or threads, or processes) are merged
+exactly, and the normalization can be applied in place, chunk by chunk, which
+also works on ``np.memmap`` arrays.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from dicca._utils import chunk_slices
+
+DEFAULT_CHUNK_ROWS = 65536
+
+
+class RunningStats:
+    """Mergeable running count, mean and variance
+
+    Args:
+        axis: ``None`` to reduce over all the elements of each chunk, or ``0``
+            to keep one statistic per column (the chunks are blocks of rows)
+
+    Attributes:
+        count: number of values seen
+        mean: running mean
+        m2: running sum of squared deviations from the mean
+    """
+
+    def __init__(self, axis=None):
+        if axis not in (None, 0):
+            raise ValueError(f'axis must be None or 0, got {axis}')
+        self.axis = axis
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def __repr__(self):
+        return f'RunningStats(count={self.count}, mean={self.mean}, std={self.std()})'
+
+    def _merge(self, count, mean, m2):
+        """Combine the current state with another one (Chan et al.)"""
+        if count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = count, mean, m2
+            return self
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta**2 * (self.count * count / total)
+        self.count = total
+        return self
+
+    def update(self, chunk):
+        """Add a chunk of values to the statistics
+
+        Args:
+            chunk: array of values. With ``axis=0`` it must be 2D (rows, columns)
+
+        Returns:
+            The updated object, so that calls can be chained
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if self.axis is None:
+            chunk = chunk.ravel()
+        if chunk.shape[0] == 0:
+            return self
+
+        mean = chunk.mean(axis=0)
+        m2 = ((chunk - mean)**2).sum(axis=0)
+        return self._merge(chunk.shape[0], mean, m2)
+
+    def merge(self, other):
+        """Merge the statistics of ``other`` into this object
+
+        Args:
+            other: a ``RunningStats`` computed on a different part of the data
+
+        Returns:
+            The updated object
+        """
+        if other.axis != self.axis:
+            raise ValueError('cannot merge statistics computed over different axes')
+        return self._merge(other.count, other.mean, other.m2)
+
+    def __add__(self, other):
+        result = RunningStats(self.axis)
+        result._merge(self.count, self.mean, self.m2)
+        return result.merge(other)
+
+    def var(self, ddof=0):
+        """Variance of the values seen so far"""
+        if self.count - ddof <= 0:
+            return np.nan * np.ones_like(self.mean)
+        return self.m2 / (self.count - ddof)
+
+    def std(self, ddof=0):
+        """Standard deviation of the values seen so far"""
+        return np.sqrt(self.var(ddof))
+
+
+def running_stats(arr, axis=None, chunk_rows=DEFAULT_CHUNK_ROWS, workers=1):
+    """Compute the statistics of ``arr`` reading it once, in blocks of rows
+
+    Args:
+        arr: array or ``np.memmap``
+        axis: ``None`` for global statistics, ``0`` for one per column
+        chunk_rows: number of rows read at a time
+        workers: number of threads. Each one accumulates its own chunks and
+            the partial states are merged at the end
+
+    Returns:
+        A ``RunningStats`` object
+    """
+    slices = chunk_slices(len(arr), chunk_rows)
+    if workers <= 1:
+        stats = RunningStats(axis)
+        for rows in slices:
+            stats.update(arr[rows])
+        return stats
+
+    with ThreadPoolExecutor(workers) as pool:
+        partials = pool.map(lambda rows: RunningStats(axis).update(arr[rows]), slices)
+        stats = RunningStats(axis)
+        for partial in partials:
+            stats.merge(partial)
+    return stats
+
+
+def standardize(arr, axis=None, chunk_rows=DEFAULT_CHUNK_ROWS, stats=None, out=None, workers=1):
+    """Normalize ``arr`` to zero mean and unit standard deviation
+
+    Args:
+        arr: array or ``np.memmap``
+        axis: ``None`` for global statistics, ``0`` for one per column
+        chunk_rows: number of rows read at a time
+        stats: precomputed ``RunningStats``. If not given they are computed first
+        out: array to store the result. Pass ``arr`` itself to normalize in
+            place, e.g. a memmap opened with ``mode='r+'``
+        workers: number of threads used to compute the statistics
+
+    Returns:
+        The normalized array (``out`` if given)
+    """
+    if stats is None:
+        stats = running_stats(arr, axis, chunk_rows, workers)
+    if out is None:
+        out = np.empty(np.shape(arr), dtype=np.result_type(arr, np.float64))
+
+    mean, std = stats.mean, stats.std()
+    for rows in chunk_slices(len(arr), chunk_rows):
+        out[rows] = (arr[rows] - mean) / std
+    return out
+
+
+def normalize_var(var):
+    """Drop-in replacement of ``np_normalize_var`` from ``00_exercise.py``
+
+    Args:
+        var: array of values
+
+    Returns:
+        A normalized copy of ``var`` using the mean and standard deviation of all its values
+    """
+    return standardize(np.asarray(var))
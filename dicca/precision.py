@@ -0,0 +1,232 @@
+"""Project-wide precision policy.
+
+Everything in the lessons is float64 by default: ``np.loadtxt`` output,
+``np.random.uniform``, pandas frames and xarray variables. Wave variables
+rarely need more than four significant digits, so storing them in float32, or
+in int16 with a scale factor, halves (or quarters) the working set. The
+current ``PrecisionPolicy`` is read by the loaders (``cache``, ``simar``,
+``timeseries``, ``fields``) and by the reduction kernels (``stats``), and
+``validate`` reports the error of a computation against float64. The int16
+storage is used by ``MaskedColumn``, e.g. ``read_simar(path, masked=True)``
+under the ``'packed'`` policy.
+
+Example:
+    >>> from dicca import precision
+    >>> with precision.use_policy('single'):
+    ...     time, data = read_simar('data/SIMAR_gaps.txt')   # float32 columns
+    >>> with precision.use_policy('packed'):
+    ...     time, data = read_simar('data/SIMAR_gaps.txt', masked=True)   # int16 Hm0, Tp, DirM...
+    >>> precision.validate(lambda: describe(data['Hm0']), policy='single')
+"""
+
+from contextlib import contextmanager
+
+import numpy as np
+
+INT16_MISSING = np.iinfo(np.int16).min
+
+
+def encode(values, scale, offset=0.0, dtype=np.int16, missing=None):
+    """Integers ``round((values - offset) / scale)``, with ``missing`` in place of NaN
+
+    Args:
+        values: floating values
+        scale: value of one unit, e.g. 0.01 for centimetres
+        offset: value of 0
+        dtype: integer dtype
+        missing: integer written for NaN. Default: the smallest value of
+            ``dtype`` (``INT16_MISSING`` for int16), which no value may take
+
+    Returns:
+        A new array; ``OverflowError`` is raised if a value does not fit
+    """
+    info = np.iinfo(dtype)
+    missing = info.min if missing is None else missing
+    scaled = np.round((np.asarray(values, dtype=np.float64) - offset) / scale)
+    lowest = info.min + 1 if missing == info.min else info.min
+    if (np.nanmin(scaled, initial=lowest) < lowest) or (np.nanmax(scaled, initial=info.max) > info.max):
+        raise OverflowError(f'values do not fit in {np.dtype(dtype)} with scale {scale} and offset {offset}')
+    scaled[np.isnan(scaled)] = missing
+    return scaled.astype(dtype)
+
+
+def decode(values, scale, offset=0.0, dtype=np.float64, missing=None):
+    """Floating values of integers stored by ``encode``, NaN where they are ``missing``"""
+    values = np.asarray(values)
+    missing = np.iinfo(values.dtype).min if missing is None else missing
+    out = values.astype(dtype)
+    out *= scale
+    out += offset
+    out[values == missing] = np.nan
+    return out
+
+
+class PrecisionPolicy:
+    """Dtypes used to store and compute floating point data
+
+    Args:
+        float_dtype: dtype of loaded data and of the temporaries of the kernels
+        scale_factors: ``{name: (scale, offset)}`` of the variables stored as
+            int16, decoded as ``value * scale + offset``
+        name: label of the policy
+    """
+
+    def __init__(self, float_dtype=np.float64, scale_factors=None, name='custom'):
+        self.float_dtype = np.dtype(float_dtype)
+        if self.float_dtype.kind != 'f':
+            raise TypeError(f'float_dtype must be a floating dtype, got {self.float_dtype}')
+        self.scale_factors = dict(scale_factors or {})
+        self.name = name
+
+    def __repr__(self):
+        return (f'PrecisionPolicy(name={self.name!r}, float_dtype={self.float_dtype}, '
+                f'packed={sorted(self.scale_factors)})')
+
+    def cast(self, values):
+        """``values`` as ``float_dtype``, without a copy if they already are"""
+        return np.asarray(values).astype(self.float_dtype, copy=False)
+
+    def cast_frame(self, df):
+        """DataFrame with its floating columns cast to ``float_dtype``"""
+        floats = df.select_dtypes('floating').columns
+        return df.astype({col: self.float_dtype for col in floats}, copy=False)
+
+    def cast_dataset(self, ds):
+        """xarray Dataset or DataArray with its floating variables cast to ``float_dtype``"""
+        if hasattr(ds, 'data_vars'):
+            return ds.map(lambda da: da.astype(self.float_dtype) if da.dtype.kind == 'f' else da,
+                          keep_attrs=True)
+        return ds.astype(self.float_dtype) if ds.dtype.kind == 'f' else ds
+
+    def encode(self, values, name):
+        """Compact storage of variable ``name``: int16 if it has a scale factor
+
+        Missing values are stored as ``INT16_MISSING``.
+        """
+        if name not in self.scale_factors:
+            return self.cast(values)
+        return encode(values, *self.scale_factors[name])
+
+    def decode(self, values, name):
+        """Floating values of variable ``name`` from its compact storage"""
+        values = np.asarray(values)
+        if values.dtype != np.int16 or name not in self.scale_factors:
+            return self.cast(values)
+        return decode(values, *self.scale_factors[name], dtype=self.float_dtype)
+
+    def masked(self, values, name, sentinel=None):
+        """``MaskedColumn`` of variable ``name``: int16 if it has a scale factor, else as ``values``"""
+        from dicca.masked import MaskedColumn
+
+        if name not in self.scale_factors:
+            return MaskedColumn.from_sentinel(values, sentinel)
+        scale, offset = self.scale_factors[name]
+        return MaskedColumn.from_sentinel(values, sentinel, dtype=np.int16, scale=scale, offset=offset)
+
+
+# scale factors of the SIMAR and data_waves variables: centimetres, centiseconds, tenths of degree
+WAVE_SCALE_FACTORS = {
+    name: (scale, 0.0)
+    for names, scale in [(('Hm0', 'Hm0_V', 'Hm0_F1', 'Hm0_F2', 'hs', 'h'), 0.01),
+                         (('Tm02', 'Tp', 'Tm02_F1', 'Tm02_F2', 'tm', 'tp'), 0.01),
+                         (('DirM', 'DirM_V', 'DirM_F1', 'DirM_F2', 'DirV', 'dirm', 'dp', 'spr'), 0.1),
+                         (('VelV', 'uw', 'vw'), 0.01)]
+    for name in names
+}
+
+POLICIES = {
+    'double': PrecisionPolicy(np.float64, name='double'),
+    'single': PrecisionPolicy(np.float32, name='single'),
+    'packed': PrecisionPolicy(np.float32, WAVE_SCALE_FACTORS, name='packed'),
+}
+
+_current = POLICIES['double']
+
+
+def get_policy(policy=None):
+    """The policy ``policy`` (a name or a ``PrecisionPolicy``), or the current one if None"""
+    if policy is None:
+        return _current
+    if isinstance(policy, PrecisionPolicy):
+        return policy
+    try:
+        return POLICIES[policy]
+    except KeyError:
+        raise ValueError(f'unknown policy {policy!r}, use one of {list(POLICIES)}') from None
+
+
+def set_policy(policy):
+    """Set the current policy, by name or as a ``PrecisionPolicy``
+
+    Returns:
+        The previous policy
+    """
+    global _current
+    previous, _current = _current, get_policy(policy)
+    return previous
+
+
+@contextmanager
+def use_policy(policy):
+    """Context manager that sets the policy and restores the previous one on exit"""
+    previous = set_policy(policy)
+    try:
+        yield _current
+    finally:
+        set_policy(previous)
+
+
+def _leaves(result):
+    """Numeric arrays in a result made of arrays, dicts, tuples, lists and pandas/xarray objects"""
+    if isinstance(result, dict):
+        for key, value in result.items():
+            for name, leaf in _leaves(value):
+                yield f'{key}.{name}' if name else str(key), leaf
+    elif isinstance(result, (list, tuple)):
+        for i, value in enumerate(result):
+            for name, leaf in _leaves(value):
+                yield f'{i}.{name}' if name else str(i), leaf
+    elif hasattr(result, 'to_numpy') and hasattr(result, 'columns'):  # DataFrame
+        for col in result.columns:
+            yield str(col), result[col].to_numpy()
+    elif hasattr(result, 'data_vars'):  # Dataset
+        for var in result.data_vars:
+            yield str(var), result[var].values
+    else:
+        values = getattr(result, 'values', result)
+        values = np.asarray(values)
+        if values.dtype.kind in 'fiuc':
+            yield '', values
+
+
+def validate(func, *args, policy='single', **kwargs):
+    """Run ``func`` under float64 and under ``policy`` and compare the results
+
+    The loaders and kernels called by ``func`` pick up the policy, so the
+    harness measures the end-to-end effect of the reduced precision.
+
+    Args:
+        func: function returning arrays, scalars, dicts or tuples of them,
+            DataFrames or Datasets
+        *args: positional arguments of ``func``
+        policy: policy compared with float64
+        **kwargs: keyword arguments of ``func``
+
+    Returns:
+        A dict ``{output: (max_abs_error, max_rel_error)}``
+    """
+    with use_policy('double'):
+        reference = dict(_leaves(func(*args, **kwargs)))
+    with use_policy(policy):
+        compact = dict(_leaves(func(*args, **kwargs)))
+
+    report = {}
+    for name, ref in reference.items():
+        ref = ref.astype(np.float64)
+        value = compact[name].astype(np.float64)
+        err = np.abs(value - ref)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rel = np.where(ref != 0, err / np.abs(ref), err)
+        finite = np.isfinite(err)
+        report[name or 'result'] = (float(err[finite].max(initial=0)), float(rel[finite].max(initial=0)))
+    return report
@@ -0,0 +1,185 @@
+"""Streaming approximate quantiles with a KLL sketch.
+
+``02_numpy.py`` computes ``numpy.percentile(g, 68.27) - numpy.percentile(g, 31.73)``
+on an array that fits in memory. When the sample is too large to be held at
+once, a KLL sketch (Karnin, Lang and Liberty, 2016) keeps a small weighted
+subset of the values from which any quantile can be estimated with a small
+rank error. The sketch is updated with whole chunks (the compactions are
+vectorized) and sketches built on different chunks or processes merge into
+one that summarizes all the data.
+
+Example:
+    >>> sketch = KLLSketch(k=400)
+    >>> for chunk in chunks:
+    ...     sketch.update(chunk)
+    >>> p31, p68 = sketch.percentile([31.73, 68.27])
+"""
+
+import math
+
+import numpy as np
+
+DEFAULT_K = 200
+_C = 2 / 3
+# largest normalized rank error over the quantiles, times k: measured on 10**5 to
+# 10**6 values for k from 20 to 400, chunked and merged; typically about 2
+_ERROR = 3.5
+
+
+class KLLSketch:
+    """Mergeable quantile sketch
+
+    Args:
+        k: size of the largest compactor. The normalized rank error of the
+            quantiles stays below about ``3.5 / k`` (see ``rank_error``), and
+            the memory is about ``3 * k`` values
+        seed: seed of the random choices of the compactions
+
+    Attributes:
+        count: number of values added to the sketch
+        min: smallest value seen
+        max: largest value seen
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        if k < 8:
+            raise ValueError(f'k must be at least 8, got {k}')
+        self.k = int(k)
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_error(cls, eps, seed=None):
+        """Sketch whose normalized rank error stays below about ``eps``"""
+        return cls(max(math.ceil(_ERROR / eps), 8), seed)
+
+    def __repr__(self):
+        return f'KLLSketch(k={self.k}, count={self.count}, retained={self.retained})'
+
+    @property
+    def rank_error(self):
+        """Largest normalized rank error of the quantiles, measured empirically
+
+        It is not a guaranteed bound: the compactions are random, and the
+        typical error is about half of it.
+        """
+        return _ERROR / self.k
+
+    @property
+    def retained(self):
+        """Number of values kept in the sketch"""
+        return sum(len(level) for level in self._levels)
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(int(math.ceil(self.k * _C**depth)), 2)
+
+    def _compress(self):
+        """Compact the levels that are over capacity, from the bottom up"""
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                # an odd item stays at this level, the others are halved and promoted
+                keep = items[:len(items) % 2]
+                pairs = items[len(keep):]
+                promoted = pairs[self._rng.integers(2)::2]
+                self._levels[level] = keep
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """Add a chunk of values. NaN values are ignored
+
+        Returns:
+            The sketch itself, so that calls can be chained
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+
+        self.count += values.size
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Merge the values summarized by ``other`` into this sketch
+
+        Returns:
+            The sketch itself
+        """
+        self.k = max(self.k, other.k)
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted(self):
+        """Retained values sorted, with their cumulative weights"""
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(level), 2**h, dtype=np.int64)
+                                  for h, level in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Estimate the quantiles ``q`` in [0, 1], as ``np.quantile``"""
+        q = np.asarray(q, dtype=np.float64)
+        if np.any((q < 0) | (q > 1)):
+            raise ValueError('quantiles must be in the range [0, 1]')
+        if self.count == 0:
+            return np.full(q.shape, np.nan)[()]
+
+        items, cumweight = self._weighted()
+        idx = np.searchsorted(cumweight, q * cumweight[-1], side='left')
+        result = items[np.minimum(idx, len(items) - 1)]
+        # the exact extremes are known
+        result = np.where(q == 0, self.min, np.where(q == 1, self.max, result))
+        return result[()]
+
+    def percentile(self, p):
+        """Estimate the percentiles ``p`` in [0, 100], as ``np.percentile``"""
+        return self.quantile(np.asarray(p, dtype=np.float64) / 100)
+
+    def cdf(self, values):
+        """Estimated fraction of the values less than or equal to ``values``"""
+        if self.count == 0:
+            return np.full(np.shape(values), np.nan)[()]
+        items, cumweight = self._weighted()
+        idx = np.searchsorted(items, values, side='right')
+        cumweight = np.concatenate([[0], cumweight])
+        return (cumweight[idx] / cumweight[-1])[()]
+
+
+def sketch_percentiles(chunks, percentiles, k=DEFAULT_K, seed=None):
+    """Approximate percentiles of a stream of chunks
+
+    Args:
+        chunks: iterable of arrays
+        percentiles: percentiles in [0, 100]
+        k: accuracy parameter of the sketch
+        seed: seed of the sketch
+
+    Returns:
+        The estimated percentiles
+    """
+    sketch = KLLSketch(k, seed)
+    for chunk in chunks:
+        sketch.update(chunk)
+    return sketch.percentile(percentiles)
@@ -0,0 +1,45 @@
+"""Linear regression models with scikit-learn, following ``08_sckitlearn_regression.py``."""
+
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+MODELS = {
+    'linear': LinearRegression,
+    'ridge': Ridge,
+    'lasso': Lasso,
+}
+
+
+def fit_regression(X, y, model='linear', test_size=0.3, random_state=17, scale=True, **kwargs):
+    """Fit a linear model on a train split and score it on the test split
+
+    Args:
+        X: array with shape (n_samples, n_features)
+        y: target values
+        model: one of ``MODELS``
+        test_size: fraction of the samples kept for testing
+        random_state: seed of the split
+        scale: standardize the features before fitting
+        **kwargs: parameters of the model, e.g. ``alpha`` for ridge and lasso
+
+    Returns:
+        A dict with the fitted ``model`` and its ``train_score``, ``test_score``
+        (coefficient of determination) and ``mse`` on the test split
+    """
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size,
+                                                        random_state=random_state)
+    estimator = MODELS[model](**kwargs)
+    if scale:
+        estimator = make_pipeline(StandardScaler(), estimator)
+    estimator.fit(X_train, y_train)
+
+    y_pred = estimator.predict(X_test)
+    return {
+        'model': estimator,
+        'train_score': estimator.score(X_train, y_train),
+        'test_score': r2_score(y_test, y_pred),
+        'mse': mean_squared_error(y_test, y_pred),
+    }
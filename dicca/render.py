@@ -0,0 +1,176 @@
+"""Batch rendering of figures in a process pool.
+
+``03_matplotlib.py`` saves one figure at a time with
+``plt.savefig('my_plot1.png', dpi=300)``. For a report that draws the same
+kind of figure for thousands of nodes, ``render_batch`` calls a plotting
+function once per parameter set in a pool of processes on the Agg backend.
+Each worker creates the figure, its canvas and its axes once per template and
+clears them between figures instead of building a new figure every time, and every
+file is written to a temporary name and renamed, so that an interrupted run
+never leaves a truncated image behind.
+
+Example:
+    >>> def draw(fig, ax, node, hs):
+    ...     ax.plot(hs)
+    ...     ax.set_title(f'node {node}')
+    >>> params = [dict(node=n, hs=load(n)) for n in nodes]
+    >>> results = render_batch(draw, params, 'pics/hs_{node}.png', dpi=150)
+    >>> report(results)
+"""
+
+import os
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+Rendered = namedtuple('Rendered', ['path', 'seconds', 'error'])
+
+# figures created by this process, by template: (fig, axs, layout of the axes)
+_FIGURES = {}
+
+
+def _file_mode():
+    """Permissions of a new file under the umask of the process"""
+    # os.umask can only be read by setting it, so do it once, before any thread starts
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+FILE_MODE = _file_mode()
+
+
+def _template_key(template):
+    return tuple(sorted((k, repr(v)) for k, v in template.items()))
+
+
+def get_figure(**template):
+    """Figure and axes of a template
+
+    The figure, its canvas and its axes are created the first time. For
+    every later figure the axes are cleared and put back in place, and what
+    the previous figure added (colorbars, insets, legends, texts) is removed.
+
+    Args:
+        **template: ``figsize`` and the arguments of ``Figure.subplots``
+            (``nrows``, ``ncols``, ``sharex``, ``subplot_kw``, ...)
+
+    Returns:
+        Tuple ``(fig, axs)`` as ``plt.subplots``
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    key = _template_key(template)
+    if key not in _FIGURES:
+        template = dict(template)
+        fig = Figure(figsize=template.pop('figsize', None))
+        FigureCanvasAgg(fig)
+        axs = fig.subplots(**template)
+        layout = [(ax, ax.get_position()) for ax in fig.axes]
+        _FIGURES[key] = fig, axs, layout
+        return fig, axs
+
+    fig, axs, layout = _FIGURES[key]
+    template_axes = {ax for ax, _ in layout}
+    for ax in fig.axes:
+        if ax not in template_axes:
+            ax.remove()
+    # the suptitle and the super labels are figure texts too
+    for artist in fig.legends + fig.texts + fig.images + fig.lines + fig.patches + fig.artists:
+        artist.remove()
+    for ax, position in layout:
+        ax.clear()
+        # colorbars shrink their parent axes
+        ax.set_position(position)
+    return fig, axs
+
+
+def save_atomic(fig, path, **kwargs):
+    """Save a figure to a temporary file in the same directory and rename it to ``path``"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    root, ext = os.path.splitext(os.path.basename(path))
+    fd, tmp = tempfile.mkstemp(prefix=f'.{root}.', suffix=ext, dir=directory)
+    try:
+        # mkstemp creates the file readable by its owner only
+        os.fchmod(fd, FILE_MODE)
+        with os.fdopen(fd, 'wb') as f:
+            fig.savefig(f, format=kwargs.pop('format', ext[1:] or None), **kwargs)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _output_path(path, params):
+    return path(**params) if callable(path) else path.format(**params)
+
+
+def render_one(plot_func, params, path, template, savefig_kw):
+    """Draw one figure with ``plot_func(fig, axs, **params)`` and save it
+
+    Returns:
+        A ``Rendered`` with the output path, the seconds spent drawing and
+        saving, and the error message if it failed (None otherwise)
+    """
+    start = time.perf_counter()
+    try:
+        path = _output_path(path, params)
+        fig, axs = get_figure(**template)
+        plot_func(fig, axs, **params)
+        save_atomic(fig, path, **savefig_kw)
+    except Exception as err:
+        return Rendered(path, time.perf_counter() - start, f'{type(err).__name__}: {err}')
+    return Rendered(path, time.perf_counter() - start, None)
+
+
+def _init_worker():
+    import matplotlib
+
+    matplotlib.use('Agg')
+
+
+def render_batch(plot_func, params, path, template=None, workers=None, **savefig_kw):
+    """Render one figure per parameter set in parallel
+
+    Args:
+        plot_func: function called as ``plot_func(fig, axs, **p)`` for each
+            ``p`` in ``params``. It must draw on the given figure, not through
+            ``plt``, and be defined at module level so that it can be sent
+            to the workers
+        params: list of dicts of keyword arguments
+        path: output file, either a format string filled with the parameters
+            (``'pics/hs_{node}.png'``) or a function of the parameters
+        template: arguments of ``get_figure``. Default: one axis of the
+            default size
+        workers: number of processes. Default: one per CPU. ``1`` renders in
+            this process
+        **savefig_kw: passed to ``fig.savefig``, e.g. ``dpi=300``
+
+    Returns:
+        A list of ``Rendered``, in the order of ``params``. Failures are
+        reported in their ``error`` field and do not stop the batch
+    """
+    params = list(params)
+    template = dict(template or {})
+    workers = min(workers or os.cpu_count() or 1, max(len(params), 1))
+
+    args = [(plot_func, p, path, template, savefig_kw) for p in params]
+    if workers == 1:
+        return [render_one(*a) for a in args]
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        chunksize = max(len(args) // (4 * workers), 1)
+        return list(pool.map(render_one, *zip(*args), chunksize=chunksize))
+
+
+def report(results, file=sys.stdout):
+    """Print the time of every figure, the failures and the totals"""
+    for r in results:
+        status = f'FAILED {r.error}' if r.error else ''
+        print(f'{r.seconds:8.3f}s  {r.path}  {status}', file=file)
+    failed = sum(r.error is not None for r in results)
+    total = sum(r.seconds for r in results)
+    print(f'{len(results)} figures, {failed} failed, {total:.3f}s of rendering', file=file)
@@ -0,0 +1,194 @@
+"""Wave and wind roses: joint counts of magnitude and direction.
+
+``03_matplotlib.py`` draws polar bar charts from random radii, while the SIMAR
+files carry ``Hm0``/``DirM`` and ``VelV``/``DirV`` and ``data_waves.dat`` the
+``dirm``, ``dp``, ``uw`` and ``vw`` columns. A ``Rose`` bins magnitude and
+direction of a whole chunk at once: both bin indices are combined into one
+flat index and counted with a single ``np.bincount``. Sectors are centred on
+the cardinal directions, so the first one wraps around north; values below
+the calm threshold are counted apart, without direction. Roses with the same
+bins are merged, e.g. the files of one node or the years of one season, and
+are drawn from the counts alone.
+
+Example:
+    >>> rose = Rose([0.5, 1, 2, 3, 4, np.inf], n_sectors=16, calm=0.5)
+    >>> for path in paths:
+    ...     time, data = read_simar(path)
+    ...     rose.update(data['Hm0'], data['DirM'])
+    >>> rose.plot()
+"""
+
+import numpy as np
+
+
+def direction_from_components(u, v):
+    """Speed and direction the wind comes from, in degrees clockwise from north
+
+    Args:
+        u: eastward component
+        v: northward component
+
+    Returns:
+        Tuple ``(speed, direction)``
+    """
+    u, v = np.asarray(u, dtype=np.float64), np.asarray(v, dtype=np.float64)
+    return np.hypot(u, v), np.mod(270 - np.degrees(np.arctan2(v, u)), 360)
+
+
+class Rose:
+    """Counts of (magnitude, direction) pairs
+
+    Magnitudes above the last edge are counted in ``overflow`` and pairs with
+    a NaN in ``missing``, so that the frequencies account for every value.
+
+    Args:
+        edges: increasing edges of the magnitude bins. The first edge is the
+            lowest magnitude counted (values below it are calm) and the last
+            one can be ``np.inf`` for an open bin
+        n_sectors: number of direction sectors; sector 0 is centred on north
+        calm: magnitudes below this value are calm. Default: the first edge
+    """
+
+    def __init__(self, edges, n_sectors=16, calm=None):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        if self.edges.ndim != 1 or len(self.edges) < 2 or np.any(np.diff(self.edges) <= 0):
+            raise ValueError('edges must be a 1D increasing array with at least two values')
+        if calm is not None and calm > self.edges[0]:
+            raise ValueError('the calm threshold must not be above the first edge')
+        self.n_sectors = int(n_sectors)
+        self.calm_limit = self.edges[0] if calm is None else float(calm)
+        self.counts = np.zeros((self.n_sectors, len(self.edges) - 1), dtype=np.int64)
+        self.calm = 0
+        self.overflow = 0
+        self.missing = 0
+
+    def __repr__(self):
+        return (f'Rose(sectors={self.n_sectors}, bins={self.nbins}, '
+                f'calm={self.calm}, total={self.total})')
+
+    @property
+    def nbins(self):
+        return self.counts.shape[1]
+
+    @property
+    def sector_width(self):
+        return 360 / self.n_sectors
+
+    @property
+    def directions(self):
+        """Centre of each sector in degrees"""
+        return np.arange(self.n_sectors) * self.sector_width
+
+    @property
+    def total(self):
+        """Number of non-missing values seen, calm and out of range included"""
+        return int(self.counts.sum()) + self.calm + self.overflow
+
+    def update(self, magnitude, direction):
+        """Add a chunk of values
+
+        Args:
+            magnitude: speed, wave height, ...
+            direction: direction in degrees clockwise from north, any range
+
+        Returns:
+            The rose itself, so that calls can be chained
+        """
+        magnitude = np.asarray(magnitude, dtype=np.float64).ravel()
+        direction = np.asarray(direction, dtype=np.float64).ravel()
+        if magnitude.shape != direction.shape:
+            raise ValueError('magnitude and direction must have the same size')
+
+        missing = np.isnan(magnitude) | np.isnan(direction)
+        calm = ~missing & (magnitude < self.calm_limit)
+        above = ~missing & (magnitude > self.edges[-1])
+        self.missing += int(missing.sum())
+        self.calm += int(calm.sum())
+        self.overflow += int(above.sum())
+        valid = ~(missing | calm | above)
+        magnitude, direction = magnitude[valid], direction[valid]
+
+        # shift by half a sector so that sector 0 covers [-w/2, w/2)
+        width = self.sector_width
+        sector = (np.mod(direction + width / 2, 360) // width).astype(np.intp)
+        sector[sector == self.n_sectors] = 0
+        # magnitudes between the calm limit and the first edge go to the first bin
+        bin_ = np.clip(np.searchsorted(self.edges, magnitude, side='right') - 1, 0, self.nbins - 1)
+
+        flat = np.bincount(sector * self.nbins + bin_, minlength=self.counts.size)
+        self.counts += flat.reshape(self.counts.shape)
+        return self
+
+    @classmethod
+    def from_components(cls, u, v, edges, n_sectors=16, calm=None):
+        """Rose of the vectors ``(u, v)``, by the direction they come from"""
+        speed, direction = direction_from_components(u, v)
+        return cls(edges, n_sectors, calm).update(speed, direction)
+
+    def merge(self, other):
+        """Add the counts of a rose with the same bins
+
+        Returns:
+            The rose itself
+        """
+        if (self.n_sectors != other.n_sectors or self.calm_limit != other.calm_limit
+                or not np.array_equal(self.edges, other.edges)):
+            raise ValueError('cannot merge roses with different bins')
+        self.counts += other.counts
+        self.calm += other.calm
+        self.overflow += other.overflow
+        self.missing += other.missing
+        return self
+
+    def __add__(self, other):
+        return self.copy().merge(other)
+
+    def copy(self):
+        result = Rose(self.edges, self.n_sectors, self.calm_limit)
+        result.merge(self)
+        return result
+
+    def frequencies(self):
+        """Percentage of the values in each (sector, bin), and of calm values
+
+        Returns:
+            Tuple ``(freq, calm)`` where ``freq`` has shape (n_sectors, nbins)
+        """
+        total = self.total
+        if total == 0:
+            return np.zeros(self.counts.shape), 0.0
+        return 100 * self.counts / total, 100 * self.calm / total
+
+    def plot(self, ax=None, cmap='viridis', label='', **kwargs):
+        """Stacked polar bars, one colour per magnitude bin
+
+        Args:
+            ax: polar axis. Default: a new figure
+            cmap: colormap of the magnitude bins
+            label: name and units of the magnitude, for the legend
+            **kwargs: passed to ``ax.bar``
+
+        Returns:
+            The polar axis
+        """
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            _, ax = plt.subplots(subplot_kw=dict(projection='polar'))
+        ax.set_theta_zero_location('N')
+        ax.set_theta_direction(-1)
+
+        freq, calm = self.frequencies()
+        theta = np.radians(self.directions)
+        width = np.radians(self.sector_width) * 0.9
+        colors = plt.get_cmap(cmap)(np.linspace(0, 1, self.nbins))
+        bottom = np.zeros(self.n_sectors)
+        for k in range(self.nbins):
+            lo, hi = self.edges[k], self.edges[k + 1]
+            name = f'{label} {lo:g}-{hi:g}' if np.isfinite(hi) else f'{label} > {lo:g}'
+            ax.bar(theta, freq[:, k], width=width, bottom=bottom, color=colors[k],
+                   label=name.strip(), **kwargs)
+            bottom += freq[:, k]
+        ax.set_title(f'calm {calm:.1f}%', loc='left', fontsize='small')
+        ax.legend(loc='upper left', bbox_to_anchor=(1.05, 1), fontsize='small')
+        return ax
@@ -0,0 +1,194 @@
+"""Spectral filtering of sampled signals, following ``04_scipy.py``.
+
+``lowpass_fft`` filters a signal held in memory as the lesson does.
+``OverlapAddFilter``, ``filter_stream`` and ``filter_array`` apply an FIR
+filter chunk by chunk by overlap-add, for records too long to transform in
+one piece.
+"""
+
+import numpy as np
+
+from dicca import fft
+from dicca._utils import chunk_slices
+
+
+def power_spectrum(sig, time_step, axis=-1):
+    """Positive frequencies and power of a real signal
+
+    Args:
+        sig: signal sampled every ``time_step``, or a batch of signals
+        time_step: sampling interval
+        axis: time axis of ``sig``
+
+    Returns:
+        Tuple ``(freqs, power)``
+    """
+    sig = np.asarray(sig)
+    freqs = fft.frequencies(sig.shape[axis], d=time_step)
+    return freqs, np.abs(fft.forward(sig, axis=axis))**2
+
+
+def peak_frequency(sig, time_step):
+    """Frequency with the largest power, excluding the mean (zero frequency)"""
+    freqs, power = power_spectrum(sig, time_step)
+    return freqs[1:][power[1:].argmax()]
+
+
+def lowpass_fft(sig, time_step, cutoff=None, axis=-1):
+    """Remove the frequencies above ``cutoff`` by zeroing their Fourier coefficients
+
+    Args:
+        sig: real signal sampled every ``time_step``, or a batch of signals
+        time_step: sampling interval
+        cutoff: highest frequency kept. Default: the peak frequency of the
+            signal, which must then be 1D
+        axis: time axis of ``sig``
+
+    Returns:
+        The filtered signal, with the same shape as ``sig``
+    """
+    sig = np.asarray(sig)
+    if cutoff is None:
+        cutoff = peak_frequency(sig, time_step)
+    n = sig.shape[axis]
+    sig_fft = fft.forward(sig, axis=axis)
+    drop = [slice(None)] * sig.ndim
+    drop[axis] = fft.frequencies(n, d=time_step) > cutoff
+    sig_fft[tuple(drop)] = 0
+    # with one or two samples, n does not tell rfft from fft coefficients
+    return fft.inverse(sig_fft, n=n, axis=axis, real=not np.iscomplexobj(sig))
+
+
+def lowpass_fir(cutoff, time_step, numtaps=255, window='hamming'):
+    """Linear-phase FIR low-pass filter for ``OverlapAddFilter``
+
+    ``lowpass_fft`` zeroes every coefficient above ``cutoff`` of the whole
+    signal, which needs the whole signal at once. A finite filter has a
+    transition band of a few ``1 / (numtaps * time_step)`` around ``cutoff``
+    instead, but it can be applied block by block.
+
+    Args:
+        cutoff: cut-off frequency, in the units of ``1 / time_step``
+        time_step: sampling interval
+        numtaps: length of the filter, odd so that the delay is a whole sample
+        window: window used by ``scipy.signal.firwin``
+
+    Returns:
+        The filter coefficients
+    """
+    from scipy import signal as sp_signal
+
+    return sp_signal.firwin(numtaps, cutoff, window=window, fs=1 / time_step)
+
+
+class OverlapAddFilter:
+    """FIR filter applied to a signal that arrives in chunks of any length
+
+    Each block is convolved with the filter by real FFTs of a fixed length and
+    the last ``len(taps) - 1`` samples of the result, which belong to the next
+    block, are kept and added to it (overlap-add). The output is the same as
+    filtering the whole signal at once, whatever the chunk boundaries.
+
+    Args:
+        taps: FIR coefficients, e.g. from ``lowpass_fir``
+        block: number of input samples transformed at a time
+        align: compensate the delay of a linear-phase filter, so that the
+            output has the length of the input and is aligned with it, as
+            ``np.convolve(sig, taps, mode='same')``
+
+    Example:
+        >>> filt = OverlapAddFilter(lowpass_fir(0.1, time_step))
+        >>> for chunk in chunks:
+        ...     write(filt.process(chunk))
+        >>> write(filt.flush())
+    """
+
+    def __init__(self, taps, block=2**16, align=True):
+        self.taps = np.asarray(taps, dtype=np.float64)
+        self.block = int(block)
+        self.nfft = fft.fast_length(self.block + len(self.taps) - 1)
+        self._taps_fft = fft.forward(self.taps, self.nfft)
+        self._tail = np.zeros(len(self.taps) - 1)
+        # output samples still to drop to compensate the delay
+        self._skip = (len(self.taps) - 1) // 2 if align else 0
+        self._align = align
+        self._n_in = 0
+        self._n_out = 0
+
+    def _convolve(self, x):
+        """Filter one block and return the samples that are complete"""
+        n = len(x)
+        y = fft.inverse(fft.forward(x, self.nfft) * self._taps_fft, self.nfft, real=True)
+        y = y[:n + len(self._tail)]
+        y[:len(self._tail)] += self._tail
+        self._tail = y[n:].copy()
+        return y[:n]
+
+    def process(self, chunk):
+        """Filter the next chunk of the signal
+
+        Returns:
+            The output samples that no later input can change. Their number
+            can differ from the length of ``chunk`` by the delay of the filter
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+        self._n_in += len(chunk)
+        out = [self._convolve(chunk[s]) for s in chunk_slices(len(chunk), self.block)]
+        out = np.concatenate(out) if out else np.empty(0)
+        if self._skip:
+            skipped = min(self._skip, len(out))
+            out = out[skipped:]
+            self._skip -= skipped
+        self._n_out += len(out)
+        return out
+
+    def flush(self):
+        """Last output samples, once the whole signal has been processed"""
+        tail = self._tail[self._skip:]
+        if self._align:
+            tail = tail[:self._n_in - self._n_out]
+        self._tail = np.zeros(len(self.taps) - 1)
+        self._n_out += len(tail)
+        return tail
+
+
+def filter_stream(chunks, taps, block=2**16, align=True):
+    """Generator of the filtered chunks of a signal
+
+    Args:
+        chunks: iterable of 1D arrays, e.g. the blocks read from a sensor file
+        taps: FIR coefficients
+        block: see ``OverlapAddFilter``
+        align: see ``OverlapAddFilter``
+    """
+    filt = OverlapAddFilter(taps, block, align)
+    for chunk in chunks:
+        out = filt.process(chunk)
+        if len(out):
+            yield out
+    out = filt.flush()
+    if len(out):
+        yield out
+
+
+def filter_array(sig, taps, out=None, chunk=2**20):
+    """Filter a 1D array that may not fit in memory, such as an ``np.memmap``
+
+    Args:
+        sig: signal, read ``chunk`` samples at a time
+        taps: FIR coefficients
+        out: array of the same length where the result is written, e.g. an
+            ``np.memmap`` opened in ``'w+'`` mode. Default: a new array
+        chunk: number of samples read at a time
+
+    Returns:
+        ``out``, aligned with ``sig``
+    """
+    if out is None:
+        out = np.empty(len(sig), dtype=np.float64)
+    pos = 0
+    pieces = (sig[s] for s in chunk_slices(len(sig), chunk))
+    for y in filter_stream(pieces, taps, block=min(chunk, 2**16)):
+        out[pos:pos + len(y)] = y
+        pos += len(y)
+    return out
@@ -0,0 +1,151 @@
+"""Parallel reader of SIMAR wave hindcast files.
+
+SIMAR files (``data/SIMAR_gaps.txt``) have a header line with the column
+names followed by hourly records of blank-separated numbers, where missing
+values are written as -99.9. ``np.loadtxt(..., skiprows=1)`` parses them in a
+single thread and the lessons then replace the negative values with NaN in a
+second pass. Here the file is split into byte ranges aligned to line breaks,
+each range is parsed in its own process with numpy's C text parser, the
+sentinel is replaced with NaN while the block is still in cache, and the date
+columns (AA MM DD HH) are turned into a ``datetime64`` index.
+
+Example:
+    >>> from dicca.simar import read_simar
+    >>> time, data = read_simar('data/SIMAR_gaps.txt')
+    >>> data['Hm0']
+"""
+
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dicca.precision import get_policy
+
+SENTINEL = -99.9
+DATE_COLUMNS = ('AA', 'MM', 'DD', 'HH')
+MIN_RANGE_BYTES = 2**20
+
+
+def read_header(path):
+    """Column names and byte offset of the first record of a SIMAR file"""
+    with open(path, 'rb') as f:
+        names = f.readline().decode().split()
+        return names, f.tell()
+
+
+def byte_ranges(path, start, n_ranges):
+    """Split ``path`` from ``start`` to the end into ranges that begin at a line start
+
+    Args:
+        path: text file
+        start: byte offset of the first record
+        n_ranges: desired number of ranges
+
+    Returns:
+        A list of ``(begin, end)`` byte offsets
+    """
+    size = os.path.getsize(path)
+    if size <= start:
+        return []
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        bounds = [start]
+        for cut in np.linspace(start, size, n_ranges + 1)[1:-1].astype(int):
+            newline = mm.find(b'\n', max(cut, bounds[-1]))
+            if newline == -1:
+                break
+            if newline + 1 > bounds[-1]:
+                bounds.append(newline + 1)
+        bounds.append(size)
+    return [(b, e) for b, e in zip(bounds[:-1], bounds[1:]) if e > b]
+
+
+def parse_range(path, begin, end, n_columns, sentinel=SENTINEL, dtype=np.float64):
+    """Parse the records between two byte offsets
+
+    Args:
+        path: SIMAR file
+        begin: offset of the first byte, at the start of a line
+        end: offset after the last byte, at the end of a line
+        n_columns: number of values per record
+        sentinel: value replaced with NaN
+        dtype: floating dtype of the result
+
+    Returns:
+        An array with shape (n_records, n_columns)
+    """
+    with open(path, 'rb') as f:
+        f.seek(begin)
+        text = f.read(end - begin).decode('ascii')
+
+    values = np.fromstring(text, dtype=dtype, sep=' ')
+    if values.size % n_columns:
+        raise ValueError(f'{path}: bytes {begin}-{end} do not contain whole records '
+                         f'of {n_columns} columns')
+    values = values.reshape(-1, n_columns)
+    if sentinel is not None:
+        values[values == dtype(sentinel)] = np.nan
+    return values
+
+
+def build_time(aa, mm, dd, hh):
+    """Hourly ``datetime64`` values from year, month, day and hour arrays"""
+    aa, mm, dd, hh = (np.asarray(v).astype(np.int64) for v in (aa, mm, dd, hh))
+    months = ((aa - 1970) * 12 + mm - 1).astype('datetime64[M]')
+    days = months.astype('datetime64[D]') + (dd - 1).astype('timedelta64[D]')
+    return days.astype('datetime64[h]') + hh.astype('timedelta64[h]')
+
+
+def read_simar(path, workers=None, sentinel=SENTINEL, dtype=None, as_frame=False, masked=False):
+    """Read a SIMAR file in parallel
+
+    Args:
+        path: SIMAR file
+        workers: number of processes. Default: one per CPU, but never more
+            than one per ``MIN_RANGE_BYTES`` of file. ``1`` parses in this process
+        sentinel: value written for missing data, replaced with NaN. ``None`` keeps it
+        dtype: floating dtype of the values. Default: that of the precision policy
+        as_frame: return a pandas DataFrame indexed by time instead
+        masked: return every column as a ``MaskedColumn`` with the missing
+            values in its bitmask. The variables with a scale factor in the
+            precision policy (``'packed'``) are stored as int16
+
+    Returns:
+        Tuple ``(time, columns)``, where ``time`` is a ``datetime64[h]`` array
+        and ``columns`` a dict of 1D arrays named after the header (Hm0, Tm02,
+        Tp, DirM, ...), or a DataFrame if ``as_frame`` is True
+    """
+    if as_frame and masked:
+        raise ValueError('as_frame and masked cannot be combined')
+    dtype = np.dtype(get_policy().float_dtype if dtype is None else dtype).type
+    names, start = read_header(path)
+    n_columns = len(names)
+
+    size = os.path.getsize(path) - start
+    workers = workers or os.cpu_count() or 1
+    workers = max(min(workers, size // MIN_RANGE_BYTES), 1)
+    ranges = byte_ranges(path, start, workers)
+
+    args = [(path, b, e, n_columns, sentinel, dtype) for b, e in ranges]
+    if workers == 1:
+        blocks = [parse_range(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            blocks = list(pool.map(parse_range, *zip(*args)))
+    # column-major so that every column is contiguous
+    values = np.asfortranarray(np.concatenate(blocks) if blocks
+                               else np.empty((0, n_columns), dtype=dtype))
+
+    columns = dict(zip(names, values.T))
+    time = build_time(*(columns.pop(name) for name in DATE_COLUMNS))
+    if masked:
+        policy = get_policy()
+        columns = {name: policy.masked(col, name) for name, col in columns.items()}
+
+    if as_frame:
+        import pandas as pd
+
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(time, name='time'))
+    return time, columns
@@ -0,0 +1,177 @@
+"""Nearest-neighbour search over the subjects of the mouse exercise.
+
+Finding the mice most similar to M_i does not require the dense distance
+matrix of ``dicca.distance``. Two kinds of queries are supported:
+
+* per time step, the points are the (weight, size, speed) of each subject at
+  that time. A KD-tree over these few dimensions answers in O(log N) per
+  query, and one tree is built lazily per time step;
+* over the whole trajectories, whose distance is ``sqrt(sum_t d_t**2)``,
+  i.e. the time steps of ``dicca.distance`` aggregated. The points have
+  ``n_time * n_feature`` dimensions, where KD-trees are slower than a scan,
+  so these queries compute the distance to every subject with one matrix
+  product per block of queries: O(N * n_time * n_feature) per query, bound by
+  the memory bandwidth of reading the trajectories once per block.
+"""
+
+import pickle
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from dicca._utils import chunk_slices
+
+# bytes of the (queries, subjects) block of squared distances of the aggregated queries
+SCAN_MEMORY_BUDGET = 64 * 2**20
+
+
+class SimilarityIndex:
+    """Top-k similarity queries between subjects
+
+    Args:
+        *features: normalized arrays with shape (time, subject), as in ``00_exercise.py``
+        leafsize: leaf size of the KD-trees
+
+    Example:
+        >>> index = SimilarityIndex(weight_normed, size_normed, speed_normed)
+        >>> subjects, dist = index.query(0, k=3)           # whole trajectories
+        >>> subjects, dist = index.query(0, k=3, time=10)  # a single time step
+    """
+
+    def __init__(self, *features, leafsize=16):
+        if not features:
+            raise ValueError('at least one feature array is required')
+        # (subject, time, feature)
+        self.points = np.stack([np.asarray(var, dtype=np.float64).T for var in features], axis=-1)
+        if self.points.ndim != 3:
+            raise ValueError('features must be (time, subject) arrays')
+        self.leafsize = leafsize
+        self._trees = {}
+
+    @property
+    def n_subject(self):
+        return self.points.shape[0]
+
+    @property
+    def n_time(self):
+        return self.points.shape[1]
+
+    def _data(self, time):
+        if time is None:
+            return self.points.reshape(self.n_subject, -1)
+        return self.points[:, time, :]
+
+    def tree(self, time):
+        """KD-tree of one time step"""
+        time = range(self.n_time)[time]  # normalize negative indices and check bounds
+        if time not in self._trees:
+            self._trees[time] = cKDTree(self._data(time), leafsize=self.leafsize)
+        return self._trees[time]
+
+    def trajectories(self):
+        """Flattened trajectories and their squared norms, used by the aggregated queries"""
+        if None not in self._trees:
+            flat = np.ascontiguousarray(self._data(None))
+            self._trees[None] = flat, np.einsum('ij,ij->i', flat, flat)
+        return self._trees[None]
+
+    def build(self, times=None):
+        """Build the trees in advance instead of on the first query
+
+        Args:
+            times: iterable of time steps. ``None`` in it prepares the
+                aggregated queries. Default: the aggregated queries only
+
+        Returns:
+            The index itself
+        """
+        for time in [None] if times is None else times:
+            if time is None:
+                self.trajectories()
+            else:
+                self.tree(time)
+        return self
+
+    def _scan(self, points, k):
+        """Exact k nearest trajectories by computing the distance to all of them"""
+        flat, sqnorm = self.trajectories()
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        idx = np.empty((len(points), k), dtype=np.intp)
+        dist = np.empty((len(points), k))
+        block = max(SCAN_MEMORY_BUDGET // (8 * self.n_subject), 1)
+        for rows in chunk_slices(len(points), block):
+            q = points[rows]
+            d2 = sqnorm - 2 * (q @ flat.T)
+            d2 += np.einsum('ij,ij->i', q, q)[:, np.newaxis]
+            cand = np.argpartition(d2, k - 1, axis=1)[:, :k] if k < self.n_subject else \
+                np.broadcast_to(np.arange(self.n_subject), d2.shape)
+            # the expansion above loses precision; rank the candidates by their exact distance
+            exact = np.linalg.norm(flat[cand] - q[:, np.newaxis, :], axis=-1)
+            order = np.argsort(exact, axis=1, kind='stable')
+            idx[rows] = np.take_along_axis(cand, order, axis=1)
+            dist[rows] = np.take_along_axis(exact, order, axis=1)
+        return idx, dist
+
+    def query_points(self, points, k=5, time=None, workers=1):
+        """Nearest subjects to arbitrary points
+
+        Args:
+            points: array with shape (n_points, n_feature) for a single time step,
+                or (n_points, n_time * n_feature) for whole trajectories
+            k: number of neighbours
+            time: time step, or ``None`` to compare whole trajectories
+            workers: threads used by the tree. ``-1`` uses all the cores.
+                Ignored by the aggregated queries, whose matrix products use
+                the threads of the BLAS library
+
+        Returns:
+            Tuple ``(subjects, distances)`` with shape (n_points, k)
+        """
+        k = min(k, self.n_subject)
+        if time is None:
+            return self._scan(points, k)
+        dist, idx = self.tree(time).query(points, k=[*range(1, k + 1)], workers=workers)
+        return idx, dist
+
+    def query(self, subjects, k=5, time=None, workers=1):
+        """Top-k most similar subjects to the given ones, excluding themselves
+
+        Args:
+            subjects: index of one subject or array of indices for a batch query
+            k: number of neighbours
+            time: time step, or ``None`` to compare whole trajectories
+            workers: threads used by the tree. ``-1`` uses all the cores
+
+        Returns:
+            Tuple ``(subjects, distances)``, each with shape (k,) for a single
+            subject or (n, k) for a batch
+        """
+        single = np.ndim(subjects) == 0
+        subjects = np.atleast_1d(subjects)
+
+        # ask for one more neighbour because each subject finds itself first
+        data = self.trajectories()[0] if time is None else self._data(time)
+        idx, dist = self.query_points(data[subjects], k + 1, time, workers)
+        not_self = idx != subjects[:, np.newaxis]
+        # keep the first k hits that are not the query (duplicated points may sort self later)
+        order = np.argsort(~not_self, axis=1, kind='stable')[:, :min(k, self.n_subject - 1)]
+        idx = np.take_along_axis(idx, order, axis=1)
+        dist = np.take_along_axis(dist, order, axis=1)
+
+        if single:
+            return idx[0], dist[0]
+        return idx, dist
+
+    def save(self, path):
+        """Save the index, including the trees already built, to ``path``"""
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with ``save``"""
+        with open(path, 'rb') as f:
+            index = pickle.load(f)
+        if not isinstance(index, cls):
+            raise TypeError(f'{path} does not contain a {cls.__name__}')
+        return index
@@ -0,0 +1,159 @@
+"""Reuse of matrix factorizations across repeated solves.
+
+``04_scipy.py`` calls ``solve(A, b)`` and then ``solve(A, B)`` with the same
+``A``, and every call factorizes it again. A ``Factorization`` computes the
+LU (or Cholesky) factors once and then solves single vectors, stacked
+right-hand sides or a stream of them for the cost of the triangular solves.
+``FactorizationCache`` keeps the most recently used factorizations keyed by
+the content hash of the matrix, so code that only has ``A`` at hand gets the
+cached factors back.
+
+Example:
+    >>> x = cached_solve(A, b)
+    >>> X = cached_solve(A, B)  # no new factorization
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import scipy.linalg as la
+
+DEFAULT_MAXSIZE = 32
+
+
+def matrix_key(A):
+    """Content hash of a matrix, including its shape and dtype"""
+    A = np.ascontiguousarray(A)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((A.shape, A.dtype.str)).encode())
+    digest.update(A.data)
+    return digest.hexdigest()
+
+
+class Factorization:
+    """LU or Cholesky factorization of a square matrix
+
+    Args:
+        A: square matrix
+        method: ``'lu'``, ``'cholesky'`` (symmetric positive-definite matrices)
+            or ``'auto'`` to try Cholesky on exactly symmetric matrices and fall
+            back to LU. ``cho_factor`` only reads one triangle, so a matrix that
+            is only nearly symmetric is always factorized by LU
+        check_finite: check the matrix for NaN and inf, as in ``scipy.linalg``.
+            A singular matrix raises ``LinAlgError``, as in ``scipy.linalg.solve``
+    """
+
+    def __init__(self, A, method='auto', check_finite=True):
+        A = np.asarray(A)
+        if A.ndim != 2 or A.shape[0] != A.shape[1]:
+            raise ValueError(f'A must be a square matrix, got shape {A.shape}')
+        if method not in ('auto', 'lu', 'cholesky'):
+            raise ValueError(f"method must be 'auto', 'lu' or 'cholesky', got {method!r}")
+
+        self.shape = A.shape
+        self.check_finite = check_finite
+        if method == 'auto':
+            method = 'cholesky' if np.array_equal(A, A.T) else 'lu'
+            if method == 'cholesky':
+                try:
+                    self._factors = la.cho_factor(A, check_finite=check_finite)
+                except la.LinAlgError:
+                    method = 'lu'
+        elif method == 'cholesky':
+            self._factors = la.cho_factor(A, check_finite=check_finite)
+        if method == 'lu':
+            self._factors = la.lu_factor(A, check_finite=check_finite)
+            # lu_factor only warns; raise as solve(A, b) does, before the factors are cached
+            if np.any(np.diag(self._factors[0]) == 0):
+                raise la.LinAlgError('Matrix is singular.')
+        self.method = method
+
+    def __repr__(self):
+        return f'Factorization(shape={self.shape}, method={self.method!r})'
+
+    def solve(self, b):
+        """Solve ``A x = b``
+
+        Args:
+            b: right-hand side with shape (n,), or (n, m) for m of them
+
+        Returns:
+            An array with the shape of ``b``
+        """
+        if self.method == 'cholesky':
+            return la.cho_solve(self._factors, b, check_finite=self.check_finite)
+        return la.lu_solve(self._factors, b, check_finite=self.check_finite)
+
+    def solve_rows(self, B):
+        """Solve for a stack of right-hand sides stored as rows, shape (m, n)"""
+        return self.solve(np.asarray(B).T).T
+
+    def solve_stream(self, rhs):
+        """Solve for each right-hand side of an iterable, as they arrive
+
+        Args:
+            rhs: iterable of arrays with shape (n,) or (n, m)
+
+        Yields:
+            The solution of each one
+        """
+        for b in rhs:
+            yield self.solve(b)
+
+
+class FactorizationCache:
+    """LRU cache of factorizations keyed by the content of the matrix
+
+    Args:
+        maxsize: number of factorizations kept
+        method: factorization method, see ``Factorization``
+
+    Attributes:
+        hits: number of lookups served from the cache
+        misses: number of factorizations computed
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, method='auto'):
+        self.maxsize = maxsize
+        self.method = method
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return (f'FactorizationCache(size={len(self)}/{self.maxsize}, '
+                f'hits={self.hits}, misses={self.misses})')
+
+    def get(self, A):
+        """Factorization of ``A``, computed only if it is not cached"""
+        key = matrix_key(A)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        factorization = Factorization(A, self.method)
+        self._entries[key] = factorization
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return factorization
+
+    def solve(self, A, b):
+        """Solve ``A x = b`` reusing the factorization of ``A`` if cached"""
+        return self.get(A).solve(b)
+
+    def clear(self):
+        self._entries.clear()
+
+
+default_cache = FactorizationCache()
+
+
+def cached_solve(A, b):
+    """Drop-in for ``solve(A, b)`` that reuses the factorization of repeated matrices"""
+    return default_cache.solve(A, b)
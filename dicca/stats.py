@@ -0,0 +1,189 @@
+"""Fused NaN-aware summary statistics.
+
+``02_numpy.py`` and ``03_matplotlib.py`` call ``np.nanmean``, ``np.nanstd``,
+``np.nanmax``, ``np.nanargmax``, ``np.percentile`` and ``np.histogram`` on the
+same series one after the other, each one a full pass over the data. The
+``describe`` kernel computes any subset of them with at most three passes:
+
+1. count, sum, mean, variance, extrema and their positions, chunk by chunk
+   (in parallel threads), merging the partial results exactly;
+2. every requested percentile with a single partition of the data;
+3. the histogram, whose range is already known from the first pass.
+
+Example:
+    >>> from dicca.stats import describe
+    >>> describe(hs, percentiles=[31.73, 50, 68.27], bins=20)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from dicca._utils import chunk_slices
+from dicca.precision import get_policy
+
+MOMENTS = ('count', 'sum', 'mean', 'var', 'std', 'min', 'max', 'argmin', 'argmax')
+DEFAULT_CHUNK_ROWS = 2**20
+
+
+def _chunk_moments(chunk, offset, dtype):
+    """Moments and extrema of one block of rows, ignoring NaN
+
+    The temporaries use ``dtype`` and the sums are accumulated in float64.
+    """
+    chunk = np.asarray(chunk, dtype=dtype)
+    valid = ~np.isnan(chunk)
+    count = valid.sum(axis=0)
+    total = np.where(valid, chunk, 0).sum(axis=0, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+    m2 = (np.where(valid, chunk - mean.astype(dtype), 0)**2).sum(axis=0, dtype=np.float64)
+
+    if len(chunk) == 0:
+        # empty input: NaN extrema, as for all-NaN columns
+        empty = np.full(chunk.shape[1:], np.nan)
+        none = np.zeros(chunk.shape[1:], dtype=np.intp)
+        return dict(count=count, sum=total, mean=mean, m2=m2, min=empty, max=empty,
+                    argmin=none, argmax=none)
+    argmin = np.where(valid, chunk, np.inf).argmin(axis=0)
+    argmax = np.where(valid, chunk, -np.inf).argmax(axis=0)
+    vmin = np.take_along_axis(chunk, np.expand_dims(argmin, 0), axis=0)[0]
+    vmax = np.take_along_axis(chunk, np.expand_dims(argmax, 0), axis=0)[0]
+    return dict(count=count, sum=total, mean=mean, m2=m2, min=vmin, max=vmax,
+                argmin=argmin + offset, argmax=argmax + offset)
+
+
+def _merge_moments(a, b):
+    """Combine the moments of two consecutive blocks (Chan et al.)"""
+    count = a['count'] + b['count']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        delta = b['mean'] - a['mean']
+        mean = np.where(a['count'] == 0, b['mean'],
+                        np.where(b['count'] == 0, a['mean'], a['mean'] + delta * b['count'] / count))
+        m2 = np.where((a['count'] == 0) | (b['count'] == 0), a['m2'] + b['m2'],
+                      a['m2'] + b['m2'] + delta**2 * a['count'] * b['count'] / count)
+
+    # NaN never wins the comparisons, and ties keep the first occurrence as np.nanargmax does
+    take_min = (b['min'] < a['min']) | np.isnan(a['min'])
+    take_max = (b['max'] > a['max']) | np.isnan(a['max'])
+    return dict(count=count, sum=a['sum'] + b['sum'], mean=mean, m2=m2,
+                min=np.where(take_min, b['min'], a['min']),
+                max=np.where(take_max, b['max'], a['max']),
+                argmin=np.where(take_min, b['argmin'], a['argmin']),
+                argmax=np.where(take_max, b['argmax'], a['argmax']))
+
+
+def moments(x, chunk_rows=DEFAULT_CHUNK_ROWS, workers=1, dtype=None):
+    """Count, sum, mean, M2, extrema and their positions in one pass, ignoring NaN
+
+    Args:
+        x: array reduced along the first axis
+        chunk_rows: number of rows per block
+        workers: number of threads
+        dtype: floating dtype of the temporaries. Default: that of the precision policy
+
+    Returns:
+        A dict of arrays with the shape of ``x[0]``
+    """
+    dtype = get_policy().float_dtype if dtype is None else dtype
+    slices = chunk_slices(len(x), chunk_rows) or [slice(0, 0)]
+    summarize = lambda rows: _chunk_moments(x[rows], rows.start, dtype)  # noqa: E731
+    if workers > 1 and len(slices) > 1:
+        with ThreadPoolExecutor(workers) as pool:
+            parts = list(pool.map(summarize, slices))
+    else:
+        parts = [summarize(rows) for rows in slices]
+
+    result = parts[0]
+    for part in parts[1:]:
+        result = _merge_moments(result, part)
+    return result
+
+
+def describe(x, stats=MOMENTS, percentiles=(), bins=None, axis=None, ddof=0,
+             chunk_rows=DEFAULT_CHUNK_ROWS, workers=1):
+    """Several NaN-aware statistics of ``x`` in as few passes as possible
+
+    Args:
+        x: array of values
+        stats: names of ``MOMENTS`` to compute
+        percentiles: percentiles in [0, 100], e.g. ``[31.73, 50, 68.27]``.
+            They are returned with keys ``p31.73``, ``p50``, ...
+        bins: number of bins, bin edges or the name of a rule of
+            ``np.histogram_bin_edges`` (``'auto'``, ``'fd'``, ...; these
+            need an extra pass over the data) for a histogram of the finite
+            values. The histogram is returned as ``hist``, a tuple ``(counts, edges)``
+        axis: ``None`` to reduce all the values, ``0`` for one result per column of a 2D array
+        ddof: delta degrees of freedom of ``var`` and ``std``
+        chunk_rows: rows per block in the first pass
+        workers: number of threads in the first pass
+
+    Returns:
+        A dict with the requested statistics. With ``axis=0`` each value has
+        one element per column (``hist`` is then a list of tuples)
+    """
+    x = np.asarray(x)
+    if axis is None:
+        x = x.ravel()
+    elif axis != 0 or x.ndim != 2:
+        raise ValueError('axis must be None, or 0 for a 2D array')
+
+    unknown = set(stats) - set(MOMENTS)
+    if unknown:
+        raise ValueError(f'unknown statistics {sorted(unknown)}, use {MOMENTS}')
+
+    result = {}
+    mom = moments(x, chunk_rows, workers)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = mom['m2'] / (mom['count'] - ddof)
+    derived = dict(mom, var=var, std=np.sqrt(var))
+    for name in ('argmin', 'argmax'):
+        # -1 marks all-NaN columns, for which np.nanargmax would raise
+        derived[name] = np.where(mom['count'] == 0, -1, mom[name])
+    for name in stats:
+        result[name] = derived[name][()]
+
+    if len(percentiles) and len(x) == 0:
+        for q in percentiles:
+            result[f'p{q:g}'] = np.full(x.shape[1:], np.nan)[()]
+    elif len(percentiles):
+        # one partition for all the percentiles; the NaN-aware version is only needed with gaps
+        has_nan = np.any(mom['count'] < len(x))
+        func = np.nanpercentile if has_nan else np.percentile
+        values = func(x, percentiles, axis=0)
+        for q, value in zip(percentiles, values):
+            result[f'p{q:g}'] = value[()]
+
+    if bins is not None:
+        columns = [x] if axis is None else x.T
+        ranges = np.broadcast_to(np.stack([mom['min'], mom['max']], axis=-1), (len(columns), 2))
+        hists = [_histogram(col, bins, rng, chunk_rows) for col, rng in zip(columns, ranges)]
+        result['hist'] = hists[0] if axis is None else hists
+    return result
+
+
+def _histogram(x, bins, value_range, chunk_rows):
+    """Histogram of the finite values of ``x`` accumulated block by block
+
+    ``value_range`` is the (min, max) of the moments pass; when it is not
+    finite because of infinities, the range of the finite values is found
+    with an extra pass.
+    """
+    if not np.isfinite(value_range).all() and not np.isnan(value_range).any():
+        finite = x[np.isfinite(x)]
+        value_range = (finite.min(), finite.max()) if len(finite) else (np.nan, np.nan)
+    if np.isnan(value_range).any():
+        value_range = (0, 1)
+    if isinstance(bins, str):
+        # the rules look at the data, e.g. its interquartile range
+        edges = np.histogram_bin_edges(x[np.isfinite(x)], bins=bins, range=tuple(value_range))
+    elif np.ndim(bins) == 0:
+        edges = np.histogram_bin_edges([], bins=int(bins), range=tuple(value_range))
+    else:
+        edges = np.asarray(bins, dtype=np.float64)
+
+    counts = np.zeros(len(edges) - 1, dtype=np.int64)
+    for rows in chunk_slices(len(x), chunk_rows):
+        chunk = x[rows]
+        counts += np.histogram(chunk[np.isfinite(chunk)], bins=edges)[0]
+    return counts, edges
@@ -0,0 +1,191 @@
+"""Columns sorted by a key for range selections by binary search.
+
+``02_numpy.py`` selects rows with ``keep = (x > -0.5) & (x < 0.4)`` and then
+applies the mask to every companion array (``x[keep]``, ``y[keep]``), which
+reads all the rows for every query. An ``IndexedTable`` sorts its columns once
+by a key column: a range of the key is then found with two binary searches and
+is a contiguous block of rows, so every column is returned as a view. Other
+columns can get their own sorted index, and compound predicates start from the
+most selective indexed range and only test the remaining conditions on those
+candidate rows. NaN (and NaT) values sort last and never meet a condition, as
+with the masks.
+
+Example:
+    >>> t = IndexedTable({'time': time, 'hs': hs, 'tp': tp}, key='time')
+    >>> t.add_index('hs')
+    >>> storm = t.select(time=(t0, t1), hs=(3, None))
+    >>> storm['tp']
+"""
+
+import numpy as np
+
+
+class IndexedTable:
+    """Table of equally long 1D columns sorted by a key column
+
+    Args:
+        columns: dict of 1D arrays with the same length
+        key: name of the column the table is sorted by
+        presorted: the columns are already sorted by ``key``, skip the sort
+
+    Attributes:
+        order: original position of each row, so that ``column[order]`` is sorted
+    """
+
+    def __init__(self, columns, key, presorted=False):
+        if key not in columns:
+            raise KeyError(f'key column {key!r} not in the table')
+        lengths = {len(col) for col in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError('all the columns must have the same length')
+
+        self.key = key
+        keys = np.asarray(columns[key])
+        if presorted:
+            self.order = np.arange(len(keys))
+        else:
+            self.order = np.argsort(keys, kind='stable')
+        # one gather per column, only at construction
+        self.columns = {name: np.asarray(col) if presorted else np.asarray(col)[self.order]
+                        for name, col in columns.items()}
+        self._key_stop = self._valid_count(self.columns[key])
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __repr__(self):
+        return f'IndexedTable(rows={len(self)}, key={self.key!r}, columns={list(self.columns)})'
+
+    def add_index(self, name):
+        """Build a secondary sorted index on column ``name``
+
+        The sorted values are kept next to the row numbers, so that queries
+        on the column never gather it again.
+        """
+        index = np.argsort(self.columns[name], kind='stable')
+        values = self.columns[name][index]
+        self._indexes[name] = index, values, self._valid_count(values)
+        return self
+
+    @staticmethod
+    def _valid_count(values):
+        """Number of sorted ``values`` before the NaN or NaT, which sort last"""
+        if values.dtype.kind in 'fc':
+            return int(np.searchsorted(values, np.nan))
+        if values.dtype.kind in 'mM':
+            return int(np.searchsorted(values, np.array('NaT', dtype=values.dtype)))
+        return len(values)
+
+    @staticmethod
+    def _bounds(values, lo, hi, inclusive, valid):
+        """Positions ``[start, stop)`` of the sorted ``values`` inside the range
+
+        ``valid`` is the number of values before the NaN, which are never inside.
+        """
+        left, right = inclusive
+        start = 0 if lo is None else np.searchsorted(values, lo, side='left' if left else 'right')
+        stop = valid if hi is None else np.searchsorted(values, hi, side='right' if right else 'left')
+        start = min(start, valid)
+        return start, max(start, min(stop, valid))
+
+    def range(self, lo=None, hi=None, inclusive=(True, True)):
+        """Rows whose key is between ``lo`` and ``hi``
+
+        Args:
+            lo: lower limit, None for no limit
+            hi: upper limit, None for no limit
+            inclusive: whether each limit is included, e.g. ``(False, False)``
+                for ``(x > lo) & (x < hi)``
+
+        Returns:
+            A dict of views of every column
+        """
+        start, stop = self._bounds(self.columns[self.key], lo, hi, inclusive, self._key_stop)
+        return {name: col[start:stop] for name, col in self.columns.items()}
+
+    def rows(self, inclusive=(True, True), **ranges):
+        """Row numbers (in key order) that meet every range condition
+
+        Args:
+            inclusive: whether the limits are included, for all the conditions
+            **ranges: ``column=(lo, hi)`` conditions, with None for no limit
+
+        Returns:
+            A sorted integer array, or a slice when only the key is constrained
+        """
+        unknown = set(ranges) - set(self.columns)
+        if unknown:
+            raise KeyError(f'unknown columns {sorted(unknown)}')
+
+        # every indexed condition is resolved by binary search; start from the smallest
+        candidates = []
+        key_range = ranges.pop(self.key, None)
+        if key_range is not None:
+            start, stop = self._bounds(self.columns[self.key], *key_range, inclusive, self._key_stop)
+            candidates.append((stop - start, slice(start, stop)))
+        for name in [n for n in ranges if n in self._indexes]:
+            index, values, valid = self._indexes[name]
+            start, stop = self._bounds(values, *ranges.pop(name), inclusive, valid)
+            candidates.append((stop - start, np.sort(index[start:stop])))
+
+        if not candidates:
+            selected = slice(0, len(self))
+        else:
+            candidates.sort(key=lambda c: c[0])
+            selected = candidates[0][1]
+            for _, other in candidates[1:]:
+                selected = self._intersect(selected, other)
+
+        # the conditions without index are only tested on the candidates
+        if ranges:
+            if isinstance(selected, slice):
+                positions = np.arange(selected.start, selected.stop)
+            else:
+                positions = selected
+            keep = np.ones(len(positions), dtype=bool)
+            left, right = inclusive
+            for name, (lo, hi) in ranges.items():
+                values = self.columns[name][positions]
+                if values.dtype.kind in 'fcmM':
+                    # NaN and NaT are never inside a range, even without limits
+                    keep &= values == values
+                if lo is not None:
+                    keep &= values >= lo if left else values > lo
+                if hi is not None:
+                    keep &= values <= hi if right else values < hi
+            selected = positions[keep]
+        return selected
+
+    @staticmethod
+    def _intersect(selected, other):
+        """Intersect a selection (slice or sorted positions) with another"""
+        if isinstance(selected, slice):
+            selected, other = other, selected
+        if isinstance(selected, slice):
+            return slice(max(selected.start, other.start), max(min(selected.stop, other.stop),
+                                                               max(selected.start, other.start)))
+        if isinstance(other, slice):
+            return selected[(selected >= other.start) & (selected < other.stop)]
+        return np.intersect1d(selected, other, assume_unique=True)
+
+    def select(self, inclusive=(True, True), **ranges):
+        """Columns of the rows meeting every range condition
+
+        Args:
+            inclusive: whether the limits are included, for all the conditions
+            **ranges: ``column=(lo, hi)`` conditions, with None for no limit
+
+        Returns:
+            A dict of arrays, gathered with a single index array (views if
+            only the key column is constrained)
+        """
+        selected = self.rows(inclusive, **ranges)
+        return {name: col[selected] for name, col in self.columns.items()}
+
+    def original_rows(self, inclusive=(True, True), **ranges):
+        """Like ``rows`` but returns the positions in the unsorted input"""
+        return np.sort(self.order[self.rows(inclusive, **ranges)])
@@ -0,0 +1,45 @@
+"""Wave time series with pandas, following ``05b_pandas_timeseries.py``."""
+
+import numpy as np
+import pandas as pd
+
+from dicca.precision import get_policy
+
+WAVES_COLUMNS = ['YY', 'mm', 'DD', 'time', 'hs', 'tm', 'tp', 'dirm', 'dp', 'spr', 'h', 'lm', 'lp',
+                 'uw', 'vw']
+
+
+def read_waves(path, tp_max=20, dropna=True):
+    """Read a ``data_waves.dat`` file into a DataFrame indexed by date
+
+    Args:
+        path: file with the columns of ``WAVES_COLUMNS`` separated by blanks
+        tp_max: peak periods below 0 or above this value are set to NaN
+        dropna: drop the records with missing values
+
+    Returns:
+        A DataFrame with a DatetimeIndex and the wave variables as columns,
+        in the float dtype of the precision policy
+    """
+    df = pd.read_table(path, header=None, sep=r'\s+', names=WAVES_COLUMNS)
+    df.index = pd.to_datetime(dict(year=df.YY, month=df.mm, day=df.DD, hour=df.time))
+    df = df.drop(columns=['YY', 'mm', 'DD', 'time'])
+
+    df.loc[(df.tp < 0) | (df.tp > tp_max), 'tp'] = np.nan
+    if dropna:
+        df = df.dropna()
+    return get_policy().cast_frame(df)
+
+
+def annual_maxima(df, column='hs'):
+    """Annual maximum of ``column`` and the date when it happened
+
+    Args:
+        df: DataFrame with a DatetimeIndex
+        column: variable to analyze
+
+    Returns:
+        A DataFrame indexed by year with the columns ``column`` and ``date``
+    """
+    groups = df[column].groupby(df.index.year)
+    return pd.DataFrame({column: groups.max(), 'date': groups.idxmax()})
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from dicca.signal import OverlapAddFilter, lowpass_fft
+
+
+@pytest.mark.parametrize('n', [1, 2, 3, 8])
+def test_lowpass_fft_short_signals(n):
+    sig = np.arange(1.0, n + 1)
+    out = lowpass_fft(sig, time_step=1.0, cutoff=1.0)
+    assert out.dtype.kind == 'f'
+    np.testing.assert_allclose(out, sig)
+
+
+@pytest.mark.parametrize('numtaps', [1, 2, 5])
+@pytest.mark.parametrize('block', [1, 2, 7])
+def test_overlap_add_matches_convolve(numtaps, block):
+    taps = np.linspace(1, 2, numtaps)
+    sig = np.random.default_rng(0).normal(size=20)
+    filt = OverlapAddFilter(taps, block=block, align=False)
+    out = np.concatenate([filt.process(sig[:9]), filt.process(sig[9:]), filt.flush()])
+    np.testing.assert_allclose(out, np.convolve(sig, taps), atol=1e-12)
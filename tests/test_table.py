@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from dicca.table import IndexedTable
+
+
+@pytest.fixture
+def columns():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-1, 1, 1000)
+    y = rng.uniform(0, 5, 1000)
+    x[::7] = np.nan
+    y[::11] = np.nan
+    return dict(x=x, y=y)
+
+
+def mask_rows(columns, inclusive, **ranges):
+    keep = np.ones(len(columns['x']), dtype=bool)
+    for name, (lo, hi) in ranges.items():
+        values = columns[name]
+        keep &= ~np.isnan(values)
+        if lo is not None:
+            keep &= values >= lo if inclusive[0] else values > lo
+        if hi is not None:
+            keep &= values <= hi if inclusive[1] else values < hi
+    return np.flatnonzero(keep)
+
+
+@pytest.mark.parametrize('inclusive', [(True, True), (False, False)])
+@pytest.mark.parametrize('ranges', [
+    dict(x=(-0.5, None)),
+    dict(x=(None, None)),
+    dict(y=(3, None)),
+    dict(x=(None, 0.4), y=(1, None)),
+    dict(x=(-0.5, 0.4), y=(None, None)),
+])
+def test_nan_never_selected(columns, inclusive, ranges):
+    expected = mask_rows(columns, inclusive, **ranges)
+    plain = IndexedTable(columns, key='x')
+    indexed = IndexedTable(columns, key='x').add_index('y')
+    for table in (plain, indexed):
+        rows = table.original_rows(inclusive, **ranges)
+        np.testing.assert_array_equal(rows, expected)
+
+
+def test_range_stops_before_nan(columns):
+    table = IndexedTable(columns, key='x')
+    selected = table.range(0.5, None, inclusive=(False, True))
+    x = columns['x']
+    assert not np.isnan(selected['x']).any()
+    assert len(selected['x']) == np.count_nonzero(x > 0.5)